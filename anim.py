@@ -0,0 +1,197 @@
+import heapq
+import itertools
+import math
+import time
+
+import numpy as np
+from xarp.entities import Element
+from xarp.spatial import Vector3
+
+from store import SceneStore
+
+LINEAR, EASE_IN_OUT_QUAD = 0, 1
+
+# Output changes smaller than this (in meters) are not sent.
+EPSILON = 1e-4
+
+
+def ease_in_out_quad(x):
+    x = np.asarray(x)
+    return np.where(x < 0.5, 2 * x * x, 1 - ((-2 * x + 2) ** 2) / 2)
+
+def _ease(kind: np.ndarray, u: np.ndarray) -> np.ndarray:
+    return np.where(kind == EASE_IN_OUT_QUAD, ease_in_out_quad(u), u)
+
+
+def _grow(a: np.ndarray, n: int, fill=0) -> np.ndarray:
+    out = np.full((n,) + a.shape[1:], fill, dtype=a.dtype)
+    out[:len(a)] = a
+    return out
+
+
+# Drives every running animation and timer from the frame clock (the sensed
+# frame's time when it has one, a monotonic clock otherwise), so choreography
+# keeps its timing no matter how fast frames arrive and replays the same every
+# time. Position tweens and flipbooks live in parallel arrays and are evaluated
+# together once per tick; only tweens whose output moved and flipbooks whose
+# frame changed produce work. One-shot timers wait in a heap by due time.
+class Scheduler:
+    def __init__(self, xr, clock = time.monotonic, capacity: int = 8):
+        self.xr = xr
+        self.clock = clock
+        self.now = clock()
+        self.dt = 0.0
+        self.ticked = False
+
+        # Position tweens.
+        self.elements: list[Element | None] = [None] * capacity
+        self.start = np.zeros((capacity, 3))
+        self.end = np.zeros((capacity, 3))
+        self.t0 = np.zeros(capacity)
+        self.duration = np.ones(capacity)
+        self.easing = np.zeros(capacity, dtype=np.int8)
+        self.loop = np.zeros(capacity, dtype=bool)
+        self.active = np.zeros(capacity, dtype=bool)
+        self.last = np.full((capacity, 3), np.nan)
+
+        # Flipbooks: on_frame(index) is called whenever the shown frame changes.
+        self.on_frame: list = [None] * capacity
+        self.fb_t0 = np.zeros(capacity)
+        self.fb_period = np.ones(capacity)
+        self.fb_count = np.ones(capacity, dtype=np.int64)
+        self.fb_index = np.full(capacity, -1, dtype=np.int64)
+        self.fb_active = np.zeros(capacity, dtype=bool)
+
+        # Timers: (due time, id, callback).
+        self.timers: list = []
+        self.timer_ids = itertools.count()
+        self.cancelled: set[int] = set()
+
+    def _slot(self, active: np.ndarray) -> int:
+        free = np.flatnonzero(~active)
+        if len(free):
+            return int(free[0])
+        n = len(active)
+        self._resize(2 * n)
+        return n
+
+    def _resize(self, n: int):
+        self.elements += [None] * (n - len(self.elements))
+        self.on_frame += [None] * (n - len(self.on_frame))
+        self.start, self.end = _grow(self.start, n), _grow(self.end, n)
+        self.t0, self.duration = _grow(self.t0, n), _grow(self.duration, n, 1)
+        self.easing, self.loop, self.active = _grow(self.easing, n), _grow(self.loop, n), _grow(self.active, n)
+        self.last = _grow(self.last, n, np.nan)
+        self.fb_t0, self.fb_period = _grow(self.fb_t0, n), _grow(self.fb_period, n, 1)
+        self.fb_count, self.fb_index = _grow(self.fb_count, n, 1), _grow(self.fb_index, n, -1)
+        self.fb_active = _grow(self.fb_active, n)
+
+    # Move element from start to end over duration seconds, repeating if loop.
+    def tween(self, element: Element, start: Vector3, end: Vector3, duration: float,
+              easing: int = EASE_IN_OUT_QUAD, loop: bool = True) -> int:
+        i = self._slot(self.active)
+        self.elements[i] = element
+        self.start[i] = start.to_numpy()
+        self.end[i] = end.to_numpy()
+        self.t0[i] = self.now
+        self.duration[i] = duration
+        self.easing[i] = easing
+        self.loop[i] = loop
+        self.last[i] = np.nan
+        self.active[i] = True
+        return i
+
+    def stop(self, tween: int):
+        self.active[tween] = False
+        self.elements[tween] = None
+
+    # Call on_frame(index) each time the frame of a count-frame flipbook changes.
+    def flipbook(self, on_frame, count: int, period: float) -> int:
+        i = self._slot(self.fb_active)
+        self.on_frame[i] = on_frame
+        self.fb_t0[i] = self.now
+        self.fb_period[i] = period
+        self.fb_count[i] = count
+        self.fb_index[i] = -1
+        self.fb_active[i] = True
+        return i
+
+    def stop_flipbook(self, flipbook: int):
+        self.fb_active[flipbook] = False
+        self.on_frame[flipbook] = None
+
+    # Call callback() once, on the first tick delay seconds or more from now.
+    def after(self, delay: float, callback) -> int:
+        timer = next(self.timer_ids)
+        heapq.heappush(self.timers, (self.now + delay, timer, callback))
+        return timer
+
+    def cancel(self, timer: int):
+        if any(pending == timer for _, pending, _ in self.timers):
+            self.cancelled.add(timer)
+
+    # Frames per second the running animations need: every frame while a tween
+    # runs, the fastest flipbook's rate otherwise, none with nothing running.
+    def rate(self) -> float:
+        if self.active.any():
+            return math.inf
+        periods = self.fb_period[self.fb_active]
+        return float(1 / periods.min()) if len(periods) else 0.0
+
+    # Current output of a tween, without advancing the clock.
+    def position(self, tween: int) -> Vector3:
+        return Vector3(self._positions(np.array([tween]))[0])
+
+    def _positions(self, rows: np.ndarray) -> np.ndarray:
+        u = (self.now - self.t0[rows]) / self.duration[rows]
+        u = np.where(self.loop[rows], u % 1.0, np.clip(u, 0.0, 1.0))
+        eased = _ease(self.easing[rows], u)
+        return self.start[rows] + (self.end[rows] - self.start[rows]) * eased[:, None]
+
+    # Advance to t, the sensed frame's time, or to the clock's time without one.
+    def tick(self, t: float | None = None):
+        now = self.clock() if t is None else t
+        if not self.ticked:
+            # Animations started before the first tick were timed by the clock;
+            # move them onto the timeline the ticks use.
+            self.ticked = True
+            self.t0 += now - self.now
+            self.fb_t0 += now - self.now
+            # A uniform shift keeps the heap ordered.
+            self.timers = [(due + now - self.now, timer, callback) for due, timer, callback in self.timers]
+            self.now = now
+        self.dt = now - self.now
+        self.now = now
+
+        rows = np.flatnonzero(self.active)
+        if len(rows):
+            positions = self._positions(rows)
+            moved = ~(np.abs(positions - self.last[rows]) < EPSILON).all(axis=1)
+            self.last[rows[moved]] = positions[moved]
+            if isinstance(self.xr, SceneStore):
+                # The store takes all moved tweens in one array write.
+                self.xr.write([self.elements[row] for row in rows[moved]], positions[moved])
+            else:
+                for row, position in zip(rows[moved], positions[moved]):
+                    element = self.elements[row]
+                    element.transform.position = Vector3(position)
+                    self.xr.update(element)
+
+            done = rows[~self.loop[rows] & (now - self.t0[rows] >= self.duration[rows])]
+            for row in done:
+                self.stop(row)
+
+        books = np.flatnonzero(self.fb_active)
+        if len(books):
+            index = ((now - self.fb_t0[books]) // self.fb_period[books]).astype(np.int64) % self.fb_count[books]
+            changed = index != self.fb_index[books]
+            for book, i in zip(books[changed], index[changed]):
+                self.fb_index[book] = i
+                self.on_frame[book](int(i))
+
+        while self.timers and self.timers[0][0] <= now:
+            _, timer, callback = heapq.heappop(self.timers)
+            if timer in self.cancelled:
+                self.cancelled.discard(timer)
+            else:
+                callback()
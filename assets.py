@@ -0,0 +1,207 @@
+import hashlib
+import io
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image
+from xarp.entities import GLBAsset, ImageAsset
+
+import glb
+
+# XR_ASSET_CACHE=<dir> keeps preprocessed assets somewhere other than .cache/assets.
+CACHE_DIR = Path(os.environ.get("XR_ASSET_CACHE", ".cache/assets"))
+
+# Modes PNG stores as they are.
+_MODES = ('L', 'RGB', 'RGBA')
+
+# Angular resolution of the headset and the distance panels are viewed from,
+# used to pick how many pixels an image needs.
+PIXELS_PER_DEGREE = 20
+VIEW_DISTANCE = 0.6
+# World size in meters of one image pixel at scale 1. The client sizes images by
+# their pixel dimensions, so the panels in main are scaled to match this.
+METERS_PER_PIXEL = 0.001
+
+
+# Pixels the headset resolves across something meters wide seen from distance.
+def apparent_pixels(meters: float, distance: float = VIEW_DISTANCE) -> float:
+    return math.degrees(2 * math.atan(meters / (2 * distance))) * PIXELS_PER_DEGREE
+
+# Pixels needed along a side of pixels source pixels shown at scale from distance.
+def display_pixels(pixels: int, scale: float, distance: float = VIEW_DISTANCE) -> int:
+    return min(pixels, max(1, math.ceil(apparent_pixels(pixels * scale * METERS_PER_PIXEL, distance))))
+
+# Size to resample a size (width, height) image to for display at scale.
+def display_size(size: tuple[int, int], scale: float, distance: float = VIEW_DISTANCE) -> tuple[int, int]:
+    longest = max(size)
+    target = display_pixels(longest, scale, distance)
+    return tuple(max(1, round(side * target / longest)) for side in size)
+
+
+def content_hash(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+# Decode an image, resample it to size and encode it as PNG. Runs in worker
+# processes.
+def encode_image(path: Path, size: tuple[int, int]) -> bytes:
+    image = Image.open(path)
+    if image.mode not in _MODES:
+        image = image.convert('RGBA')
+    if image.size != size:
+        image = image.resize(size, Image.Resampling.LANCZOS)
+    out = io.BytesIO()
+    image.save(out, format = 'PNG', optimize = True)
+    return out.getvalue()
+
+
+# A loaded (or still loading) asset, identified by the hash of its source bytes.
+class AssetHandle:
+    def __init__(self, path: Path, future: Future):
+        self.path = path
+        self._future = future
+
+    @property
+    def hash(self) -> str:
+        return self._future.result()[0]
+
+    # Block until the asset is ready and return it.
+    def get(self):
+        return self._future.result()[1]
+
+    # Scale to give the element showing a resampled image, so it keeps the size
+    # it would have had at full resolution.
+    @property
+    def scale(self) -> float | None:
+        return self._future.result()[2]
+
+    def ready(self) -> bool:
+        return self._future.done()
+
+
+# Loads GLB and image assets on a thread pool so they can be decoded while the
+# user is still calibrating. Identical files resolve to one shared asset object,
+# so the batcher only ever sees one instance per content hash. Images given the
+# scale they are shown at are resampled to what the headset can resolve from
+# the viewing distance, and models given their scale are stripped and reduced to
+# the level of detail that size calls for (see glb.py). Resampled images (as
+# PNG) and optimized models are kept in an on-disk cache keyed by hash and size
+# or level of detail, so later launches skip resampling and optimizing. With
+# processes > 0 that CPU-bound work runs in a process pool, so it does not hold
+# the GIL while sessions are running their frame loops.
+class AssetManager:
+    def __init__(self, cache_dir: Path = CACHE_DIR, workers: int = 4, quantize: bool = False, processes: int = 0):
+        self.cache_dir = Path(cache_dir)
+        self.quantize = quantize
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="assets")
+        self.processes = None
+        if processes > 0:
+            self.processes = ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+        self.lock = threading.Lock()
+        self.by_path: dict[Path, AssetHandle] = {}
+        self.by_hash: dict[str, object] = {}
+
+    def glb(self, path: str | Path, scale: float | None = None, distance: float = VIEW_DISTANCE) -> AssetHandle:
+        return self._load(Path(path), lambda path: self._load_glb(path, scale, distance), (scale, distance))
+
+    def image(self, path: str | Path, scale: float | None = None, distance: float = VIEW_DISTANCE) -> AssetHandle:
+        return self._load(Path(path), lambda path: self._load_image(path, scale, distance), (scale, distance))
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False)
+        if self.processes is not None:
+            self.processes.shutdown(wait=False)
+
+    def _load(self, path: Path, loader, variant = None) -> AssetHandle:
+        with self.lock:
+            handle = self.by_path.get((path, variant))
+            if handle is None:
+                handle = AssetHandle(path, self.pool.submit(loader, path))
+                self.by_path[(path, variant)] = handle
+        return handle
+
+    def _compute(self, fn, *args):
+        if self.processes is None:
+            return fn(*args)
+        return self.processes.submit(fn, *args).result()
+
+    def _load_glb(self, path: Path, scale: float | None, distance: float):
+        raw = path.read_bytes()
+        digest = content_hash(raw)
+        if scale is None:
+            return digest, self._share(digest, lambda: GLBAsset(raw = raw)), None
+        try:
+            lod = glb.lod_for(apparent_pixels(glb.model_size(raw) * scale, distance))
+        except (ValueError, KeyError):
+            # Not something the optimizer understands; ship it as is.
+            return digest, self._share(digest, lambda: GLBAsset(raw = raw)), None
+        key = f"{digest}-lod{lod}" + ("-q" if self.quantize else "")
+        return digest, self._share(key, lambda: GLBAsset(raw = self._optimize(key, raw, lod))), None
+
+    def _load_image(self, path: Path, scale: float | None, distance: float):
+        raw = path.read_bytes()
+        digest = content_hash(raw)
+        with Image.open(path) as image:
+            source = image.size
+        size = source if scale is None else display_size(source, scale, distance)
+        display = scale if size == source else scale * source[0] / size[0]
+        if size == source:
+            return digest, self._share(digest, lambda: ImageAsset.from_obj(obj = Image.open(path))), display
+        key = f"{digest}-{size[0]}x{size[1]}"
+        return digest, self._share(key, lambda: ImageAsset.from_obj(obj = self._resample(key, path, size))), display
+
+    def _share(self, digest: str, build):
+        # setdefault keeps the first instance if two workers race on the same content.
+        asset = self.by_hash.get(digest)
+        if asset is None:
+            asset = build()
+            with self.lock:
+                asset = self.by_hash.setdefault(digest, asset)
+        return asset
+
+    def _optimize(self, key: str, raw: bytes, lod: int) -> bytes:
+        cached = self.cache_dir / f"{key}.glb"
+        if cached.exists():
+            return cached.read_bytes()
+        try:
+            data = self._compute(glb.optimize, raw, lod, self.quantize)
+        except (ValueError, KeyError):
+            data = raw
+        self._store(cached, lambda f: f.write(data))
+        return data
+
+    def _store(self, cached: Path, write):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = cached.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, 'wb') as f:
+            write(f)
+        os.replace(tmp, cached)
+
+    def _resample(self, key: str, path: Path, size: tuple[int, int]) -> Image.Image:
+        cached = self.cache_dir / f"{key}.png"
+        if cached.exists():
+            data = cached.read_bytes()
+        else:
+            data = self._compute(encode_image, path, size)
+            self._store(cached, lambda f: f.write(data))
+        return Image.open(io.BytesIO(data))
+
+
+_shared: AssetManager | None = None
+_shared_lock = threading.Lock()
+
+# The AssetManager shared by every session in this process, so concurrent
+# sessions load, preprocess and hold each asset once. XR_QUANTIZE=1 also
+# quantizes model vertex data (needs KHR_mesh_quantization on the client).
+def shared_assets() -> AssetManager:
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = AssetManager(
+                quantize = os.environ.get("XR_QUANTIZE") == "1",
+                processes = min(4, os.cpu_count() or 1),
+            )
+        return _shared
@@ -0,0 +1,89 @@
+# Bytes per frame sent for a typical drag + animated hint, with every update sent
+# in full versus going through SceneBatcher's delta encoding.
+#
+#   python -m benchmarks.delta_bytes [frames]
+import sys
+import math
+import random
+from pathlib import Path
+
+from xarp.entities import Element, GLBAsset, DefaultAssets
+from xarp.spatial import Transform, Vector3
+
+from delta import element_fields, payload_size
+from anim import Scheduler
+from main import LinearAnimElement, WHITE
+from scene import SceneBatcher
+from visibility import Visibility
+
+
+class CountingXR:
+    def __init__(self, frames):
+        self.frames = frames
+        self.bytes = 0
+
+    def update(self, element):
+        self.bytes += payload_size(element_fields(element))
+
+    def destroy_element(self, element):
+        pass
+
+    def sense(self, **kwargs):
+        return CountingStream(self.frames)
+
+class CountingStream:
+    def __init__(self, frames):
+        self.frames = frames
+
+    def __iter__(self):
+        return iter(range(self.frames))
+
+    def close(self):
+        pass
+
+
+def run(xr, frames: int) -> int:
+    rng = random.Random(0)
+    hand_asset = GLBAsset(raw = Path("assets/hand_pinched.glb").read_bytes())
+
+    hint = Element(key = 'hand_pinch', transform = Transform(scale = Vector3.one() * .2), asset = hand_asset)
+    clock = [0.0]
+    scheduler = Scheduler(xr, clock = lambda: clock[0])
+    anim = LinearAnimElement(Visibility(xr), scheduler, hint, 40 / 90, Vector3.from_xyz(0, .3, 0), Vector3.from_xyz(-.6, .2, .35))
+    anim.show()
+    # Like main, send the model once and keep the client's copy afterwards.
+    hint.asset = None
+    dragged = Element(key = 'idea', transform = Transform(scale = Vector3.one() * .15), color = WHITE)
+    anchor = Element(key = 'wrench', transform = Transform(scale = Vector3.one() * .05), asset = DefaultAssets.SPHERE)
+
+    stream = xr.sense(hands=True)
+    for frame in stream:
+        clock[0] = frame / 90
+        scheduler.tick()
+
+        # Hand moves for half of each second and rests (with tracking jitter) for the other half.
+        moving = (frame // 45) % 2 == 0
+        t = frame / 90
+        jitter = Vector3.from_xyz(*(rng.gauss(0, .0002) for _ in range(3)))
+        base = Vector3.from_xyz(math.cos(t) * .2, .1, math.sin(t) * .2) if moving else Vector3.from_xyz(.2, .1, 0)
+        dragged.transform.position = base + jitter
+        xr.update(dragged)
+
+        xr.update(anchor)
+    stream.close()
+    return frames
+
+
+if __name__ == "__main__":
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 900
+
+    full = CountingXR(frames)
+    run(full, frames)
+
+    counted = CountingXR(frames)
+    run(SceneBatcher(counted), frames)
+
+    print(f"frames:            {frames}")
+    print(f"full bytes/frame:  {full.bytes / frames:.0f}")
+    print(f"delta bytes/frame: {counted.bytes / frames:.0f}")
+    print(f"reduction:         {full.bytes / max(counted.bytes, 1):.1f}x")
@@ -0,0 +1,168 @@
+# Per-phase frame processing time, update calls and bytes per frame for the
+# whole interaction loop, run headlessly on a scripted or recorded hand stream,
+# plus micro-benchmarks of the per-frame helpers. Prints JSON.
+#
+#   python -m benchmarks.frame_loop [--recording session.xrs] [--out results.json]
+import argparse
+import json
+import time
+from collections import defaultdict
+
+import numpy as np
+from xarp.entities import Element
+from xarp.gestures import PALM, MIDDLE_METACARPAL, THUMB_METACARPAL
+from xarp.spatial import Transform, Vector3
+
+import main
+import synthetic
+import video
+from delta import element_fields, payload_size
+from hands import HandFeatures
+from replay import read_frames
+from store import SceneStore
+from visibility import Visibility
+
+
+def percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {}
+    ms = np.array(samples) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(ms, 50)), 4),
+        'p95_ms': round(float(np.percentile(ms, 95)), 4),
+        'p99_ms': round(float(np.percentile(ms, 99)), 4),
+    }
+
+
+# Stand-in for SyncXR that serves (phase, frame) pairs and measures the time the
+# app spends on each frame along with the updates it sends while doing so.
+class BenchXR:
+    def __init__(self, frames):
+        self.frames = iter(frames)
+        self.times = defaultdict(list)
+        self.updates = defaultdict(list)
+        self.bytes = defaultdict(list)
+        self._updates = 0
+        self._bytes = 0
+
+    def sense(self, **kwargs):
+        return BenchStream(self)
+
+    def update(self, element):
+        self._updates += 1
+        self._bytes += payload_size(element_fields(element))
+
+    def destroy_element(self, element):
+        pass
+
+    def record(self, phase: str, elapsed: float):
+        self.times[phase].append(elapsed)
+        self.updates[phase].append(self._updates)
+        self.bytes[phase].append(self._bytes)
+
+    def report(self) -> dict:
+        return {
+            phase: {
+                'frames': len(self.times[phase]),
+                **percentiles(self.times[phase]),
+                'updates_per_frame': round(float(np.mean(self.updates[phase])), 3),
+                'bytes_per_frame': round(float(np.mean(self.bytes[phase])), 1),
+            }
+            for phase in self.times
+        }
+
+class BenchStream:
+    def __init__(self, xr: BenchXR):
+        self.xr = xr
+        self.closed = False
+
+    def __iter__(self):
+        for phase, frame in self.xr.frames:
+            if phase == 'video':
+                # A live session decodes the clip during the seconds before
+                # it plays; frames here arrive far faster than that.
+                video.wait_decoded()
+            self.xr._updates = self.xr._bytes = 0
+            start = time.perf_counter()
+            yield frame
+            self.xr.record(phase, time.perf_counter() - start)
+            if self.closed:
+                return
+
+    def close(self):
+        self.closed = True
+
+
+def bench_helper(fn, repeat: int = 2000) -> dict:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+# The per-hand palm normal main computed before HandFeatures, kept as the
+# baseline hand_features is compared against.
+def hand_normal(hand: tuple) -> Vector3:
+    palm = hand[PALM].position
+    index = hand[MIDDLE_METACARPAL].position
+    thumb = hand[THUMB_METACARPAL].position
+
+    crossed = np.cross((index - palm).to_numpy(), (thumb - palm).to_numpy())
+    norm = np.linalg.norm(crossed)
+    return Vector3(crossed if norm == 0 else crossed / norm)
+
+def hand_up_dist(hand: tuple) -> float:
+    return np.dot(hand_normal(hand).to_numpy(), Vector3.up().to_numpy())
+
+def bench_helpers(repeat: int) -> dict:
+    hand = synthetic.right_at_tip(synthetic.PANEL)
+    hands = next(synthetic.interaction_script())[1]['hands']
+    frame = {'hands': hands}
+    wheel = [Element(key = f'wh_{i}', transform = Transform(position = Vector3.zero())) for i in range(3)]
+    dragged = Element(key = 'idea', transform = Transform(position = Vector3.zero()))
+    origin = Vector3.from_xyz(0, .3, 0)
+    store = SceneStore(BenchXR(()))
+    visibility = Visibility(store)
+
+    def drag():
+        frame.pop('hand_features', None)
+        main.ui_drag(dragged, frame, .1, 2)
+
+    return {
+        'hand_normal': bench_helper(lambda: hand_normal(hand), repeat),
+        'hand_up_dist': bench_helper(lambda: hand_up_dist(hand), repeat),
+        'hand_features': bench_helper(lambda: HandFeatures(hands), repeat),
+        'show_wheel': bench_helper(lambda: main.show_wheel(store, visibility, wheel, origin), repeat),
+        'ui_drag': bench_helper(drag, repeat),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--recording', help = "replay a recorded session instead of the scripted flow")
+    parser.add_argument('--repeat', type = int, default = 2000, help = "iterations per helper benchmark")
+    parser.add_argument('--out', help = "write results to this file instead of stdout")
+    args = parser.parse_args()
+
+    if args.recording:
+        frames = (('recorded', frame) for _, frame in read_frames(args.recording))
+    else:
+        frames = synthetic.interaction_script()
+
+    xr = BenchXR(frames)
+    start = time.perf_counter()
+    main.main(xr, {})
+    results = {
+        'source': args.recording or 'synthetic',
+        'wall_s': round(time.perf_counter() - start, 3),
+        'phases': xr.report(),
+        'helpers': bench_helpers(args.repeat),
+    }
+
+    out = json.dumps(results, indent = 2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(out + "\n")
+    else:
+        print(out)
@@ -0,0 +1,147 @@
+# Simulates many headsets against in-process sessions of the app to size a
+# server. Each simulated client is an asyncio task streaming the scripted
+# interaction flow at the headset rate; each session runs main on its own
+# thread behind a SessionManager, as under xarp's server, with no network.
+# Reports end-to-end update latency (frame sent to resulting update received),
+# message sizes, per-session frame time and CPU per frame. Prints JSON.
+#
+#   python -m benchmarks.load [--clients 200] [--rate 90] [--out results.json]
+import argparse
+import asyncio
+import json
+import queue
+import random
+import threading
+import time
+
+import numpy as np
+
+import main
+import synthetic
+from delta import element_fields, payload_size
+from sessions import SessionManager
+
+
+# The server's side of one simulated headset: frames arrive through inbox,
+# updates go back to the client on the event loop. Successive sense() streams
+# continue from where the last one stopped, like a live headset.
+class SimulatedXR:
+    def __init__(self, client: 'Client'):
+        self.client = client
+        self.inbox = queue.SimpleQueue()
+        self.sent_at = 0.0
+
+    def sense(self, **kwargs):
+        return SimulatedStream(self)
+
+    def update(self, element):
+        self._send(payload_size(element_fields(element)))
+
+    def destroy_element(self, element):
+        self._send(len(element.key))
+
+    def _send(self, size: int):
+        self.client.loop.call_soon_threadsafe(self.client.receive, self.sent_at, size)
+
+class SimulatedStream:
+    def __init__(self, xr: SimulatedXR):
+        self.xr = xr
+
+    def __iter__(self):
+        while True:
+            item = self.xr.inbox.get()
+            if item is None:
+                return
+            self.xr.sent_at, frame = item
+            yield frame
+
+    def close(self):
+        pass
+
+
+class Client:
+    def __init__(self, loop: asyncio.AbstractEventLoop, seed: int):
+        self.loop = loop
+        self.seed = seed
+        self.xr = SimulatedXR(self)
+        self.frames = 0
+        self.latency: list[float] = []
+        self.sizes: list[int] = []
+
+    def receive(self, sent_at: float, size: int):
+        self.latency.append(time.perf_counter() - sent_at)
+        self.sizes.append(size)
+
+    async def run(self, rate: float, delay: float):
+        await asyncio.sleep(delay)
+        period = 1 / rate
+        start = time.perf_counter()
+        for _, frame in synthetic.interaction_script(seed = self.seed, rate = rate):
+            self.xr.inbox.put((time.perf_counter(), frame))
+            self.frames += 1
+            await asyncio.sleep(max(0.0, start + self.frames * period - time.perf_counter()))
+        self.xr.inbox.put(None)
+
+
+def _percentiles(values: list[float], scale: float) -> dict:
+    if not values:
+        return {}
+    values = np.array(values) * scale
+    return {p: round(float(np.percentile(values, q)), 3) for p, q in (('p50', 50), ('p95', 95), ('p99', 99))}
+
+
+async def simulate(clients: int, rate: float, ramp: float) -> dict:
+    loop = asyncio.get_running_loop()
+    manager = SessionManager(main.main)
+    rng = random.Random(0)
+    simulated = [Client(loop, seed) for seed in range(clients)]
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target = manager, args = (client.xr, {}), daemon = True) for client in simulated]
+    for thread in threads:
+        thread.start()
+    await asyncio.gather(*(client.run(rate, rng.uniform(0, ramp)) for client in simulated))
+    await asyncio.gather(*(asyncio.to_thread(thread.join) for thread in threads))
+    # Let updates queued on the loop by the last frames arrive.
+    await asyncio.sleep(0)
+    elapsed = time.perf_counter() - started
+
+    latency = [l for client in simulated for l in client.latency]
+    sizes = [s for client in simulated for s in client.sizes]
+    report = manager.report()
+    sessions = report['sessions']
+    # Process CPU over the run per session frame. It includes the simulated
+    # clients' event loop, so it is an upper bound on the app's cost.
+    cpu = report.get('cpu_ms_per_frame')
+    frame_p95 = [s['frame_ms']['p95'] for s in sessions if 'frame_ms' in s]
+    frames = sum(client.frames for client in simulated)
+    return {
+        'clients': clients,
+        'rate_hz': rate,
+        'wall_s': round(elapsed, 2),
+        'frames': frames,
+        'update_latency_ms': _percentiles(latency, 1000),
+        'messages_per_frame': round(len(sizes) / max(frames, 1), 3),
+        'message_bytes': _percentiles(sizes, 1),
+        'bytes_per_frame': round(sum(sizes) / max(frames, 1), 1),
+        'session_cpu_ms_per_frame': cpu,
+        'session_frame_p95_ms': _percentiles(frame_p95, 1),
+        # Share of one core the app needs per session at the headset rate.
+        'cores_per_session': round(cpu * rate / 1000, 4) if cpu else None,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type = int, default = 200, help = "simulated headsets")
+    parser.add_argument('--rate', type = float, default = 90, help = "frames per second each headset streams")
+    parser.add_argument('--ramp', type = float, default = 1.0, help = "seconds over which clients connect")
+    parser.add_argument('--out', help = "write results to this file instead of stdout")
+    args = parser.parse_args()
+
+    out = json.dumps(asyncio.run(simulate(args.clients, args.rate, args.ramp)), indent = 2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(out + "\n")
+    else:
+        print(out)
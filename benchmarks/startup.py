@@ -0,0 +1,113 @@
+# Time from a headset connecting to its first frames: the calibration prompt and
+# the first interactive frame after calibrating, which waits on the assets.
+# Each scenario runs in a fresh process with its own asset cache, streaming the
+# scripted calibration at the headset rate:
+#   cold      empty cache, assets requested when the session starts
+#   prefetch  empty cache, assets requested at server start, scan seconds before
+#             the headset connects (how main.py runs under xarp)
+#   warm      cache filled by an earlier run
+# Prints JSON.
+#
+#   python -m benchmarks.startup [--scan 3] [--rate 90] [--out results.json]
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import synthetic
+
+
+# Serves the scripted flow at rate frames per second across sense() calls, and
+# ends the session on the first frame of the stream after calibration.
+class PacedXR:
+    def __init__(self, rate: float):
+        self.period = 1 / rate
+        self.frames = synthetic.interaction_script(rate = rate)
+        self.streams = 0
+
+    def sense(self, **kwargs):
+        self.streams += 1
+        return PacedStream(self, 1 if self.streams > 1 else None)
+
+    def update(self, element):
+        pass
+
+    def destroy_element(self, element):
+        pass
+
+class PacedStream:
+    def __init__(self, xr: PacedXR, limit: int | None):
+        self.xr = xr
+        self.limit = limit
+
+    def __iter__(self):
+        next_at = time.perf_counter()
+        for count, (_, frame) in enumerate(self.xr.frames, 1):
+            time.sleep(max(0.0, next_at - time.perf_counter()))
+            next_at += self.xr.period
+            yield frame
+            if count == self.limit:
+                return
+
+    def close(self):
+        pass
+
+
+# One scenario, in this process. XR_ASSET_CACHE must be set before main is imported.
+def run_session(prefetch: bool, scan: float, rate: float) -> dict:
+    import main
+    from assets import shared_assets
+    from sessions import SessionManager
+
+    if prefetch:
+        main.load_assets(shared_assets())
+        time.sleep(scan)
+
+    manager = SessionManager(main.main)
+    manager(PacedXR(rate), {})
+    session = manager.report()['sessions'][0]
+    prompt, interactive = session['first_frame_s'][:2]
+    return {
+        'first_frame_s': prompt,
+        'interactive_s': interactive,
+        'calibration_frames': session['frames'] - 1,
+    }
+
+
+def scenario(name: str, cache: str, args) -> dict:
+    env = dict(os.environ, XR_ASSET_CACHE = cache)
+    out = subprocess.run(
+        [sys.executable, '-m', 'benchmarks.startup', '--child', name, '--scan', str(args.scan), '--rate', str(args.rate)],
+        env = env, capture_output = True, text = True, check = True,
+    ).stdout
+    return json.loads(out.splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scan', type = float, default = 3.0, help = "seconds from server start to the headset connecting")
+    parser.add_argument('--rate', type = float, default = 90, help = "frames per second the headset streams")
+    parser.add_argument('--out', help = "write results to this file instead of stdout")
+    parser.add_argument('--child', help = argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_session(args.child == 'prefetch', args.scan, args.rate)))
+        sys.exit()
+
+    with tempfile.TemporaryDirectory() as cold, tempfile.TemporaryDirectory() as prefetched:
+        results = {
+            'cold': scenario('cold', cold, args),
+            'warm': scenario('warm', cold, args),
+            'prefetch': scenario('prefetch', prefetched, args),
+        }
+
+    out = json.dumps(results, indent = 2)
+    if args.out:
+        with open(args.out, 'w') as f:
+            f.write(out + "\n")
+    else:
+        print(out)
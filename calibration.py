@@ -0,0 +1,126 @@
+import numpy as np
+
+
+# Weighted running mean and variance of a vector (West's weighted Welford update).
+class RunningStats:
+    def __init__(self, dim: int = 3):
+        self.weight = 0.0
+        self.weight_sq = 0.0
+        self.mean = np.zeros(dim)
+        self.m2 = np.zeros(dim)
+
+    def add(self, x: np.ndarray, w: float = 1.0):
+        if w <= 0:
+            return
+        self.weight += w
+        self.weight_sq += w * w
+        delta = x - self.mean
+        self.mean = self.mean + (w / self.weight) * delta
+        self.m2 = self.m2 + w * delta * (x - self.mean)
+
+    @property
+    def var(self) -> np.ndarray:
+        return self.m2 / self.weight if self.weight > 0 else np.full_like(self.m2, np.inf)
+
+    # Effective number of samples (Kish), which is what the standard error scales with.
+    @property
+    def n_eff(self) -> float:
+        return self.weight ** 2 / self.weight_sq if self.weight_sq > 0 else 0.0
+
+    # Standard error of the mean, per axis.
+    @property
+    def stderr(self) -> np.ndarray:
+        n = self.n_eff
+        return np.sqrt(self.var / n) if n > 1 else np.full_like(self.m2, np.inf)
+
+
+class TableCalibration:
+    def __init__(self, left: np.ndarray, right: np.ndarray, normal: np.ndarray,
+                 normal_uncertainty: float, position_uncertainty: float, frames: int):
+        self.left = left
+        self.right = right
+        # Unit normal of the table plane, pointing up.
+        self.normal = normal
+        # Angular standard error of the normal, in radians.
+        self.normal_uncertainty = normal_uncertainty
+        # Largest standard error of either palm position, in meters.
+        self.position_uncertainty = position_uncertainty
+        self.frames = frames
+
+
+# Estimates the table from both palms resting on it. Frames where the hands are
+# not in the calibration pose are ignored without discarding what was gathered,
+# and frames far from the running estimate are down-weighted (Huber weights)
+# instead of restarting the count. Finishes once the palm positions are known
+# to within tolerance meters.
+class TableEstimator:
+    def __init__(self, tolerance: float = 0.002, min_frames: int = 15, huber: float = 2.0,
+                 noise_floor: float = 0.003, restart_after: int = 20):
+        self.tolerance = tolerance
+        self.min_frames = min_frames
+        self.huber = huber
+        self.noise_floor = noise_floor
+        self.restart_after = restart_after
+        self.frames = 0
+        self._outliers = 0
+        self._reset()
+
+    def _reset(self):
+        self.left = RunningStats()
+        self.right = RunningStats()
+        self.normal = RunningStats()
+
+    def _weight(self, stats: RunningStats, x: np.ndarray) -> float:
+        if stats.n_eff < 3:
+            return 1.0
+        scale = np.sqrt(max(float(stats.var.max()), self.noise_floor ** 2))
+        r = float(np.linalg.norm(x - stats.mean)) / scale
+        return 1.0 if r <= self.huber else self.huber / r
+
+    # Add one frame. pose_ok says whether both hands are in the calibration pose.
+    def add(self, left_palm: np.ndarray, right_palm: np.ndarray, up_normal: np.ndarray, pose_ok: bool = True):
+        if not pose_ok:
+            return
+        self.frames += 1
+
+        w = min(self._weight(self.left, left_palm), self._weight(self.right, right_palm))
+        if w < 1.0:
+            self._outliers += 1
+            # The hands settled somewhere else: start over from here.
+            if self._outliers >= self.restart_after:
+                self._reset()
+                self._outliers = 0
+                w = 1.0
+        else:
+            self._outliers = 0
+
+        self.left.add(left_palm, w)
+        self.right.add(right_palm, w)
+        self.normal.add(up_normal, w)
+
+    @property
+    def position_uncertainty(self) -> float:
+        return float(max(self.left.stderr.max(), self.right.stderr.max()))
+
+    # Fraction of the way to convergence, for display.
+    @property
+    def progress(self) -> float:
+        if self.left.n_eff <= 1:
+            return 0.0
+        n = min(1.0, self.left.n_eff / self.min_frames)
+        uncertainty = self.position_uncertainty
+        return n if uncertainty <= self.tolerance else n * self.tolerance / uncertainty
+
+    @property
+    def converged(self) -> bool:
+        return self.left.n_eff >= self.min_frames and self.position_uncertainty <= self.tolerance
+
+    def result(self) -> TableCalibration:
+        normal = self.normal.mean
+        length = np.linalg.norm(normal)
+        normal = normal / length if length > 0 else np.array([0.0, 1.0, 0.0])
+        spread = float(np.linalg.norm(self.normal.stderr)) / length if length > 0 else float('inf')
+        return TableCalibration(
+            self.left.mean.copy(), self.right.mean.copy(), normal,
+            spread, self.position_uncertainty, self.frames,
+        )
@@ -0,0 +1,81 @@
+import json
+
+# Position changes smaller than this (in meters) are treated as tracking jitter.
+POSITION_EPSILON = 0.001
+
+
+def _vec(v) -> tuple | None:
+    if v is None:
+        return None
+    return tuple(v.to_numpy().tolist())
+
+# Whether a position moved by at least epsilon along any axis since last.
+def _moved(position: tuple | None, last: tuple | None, epsilon: float) -> bool:
+    if position is None or last is None:
+        return position != last
+    return any(abs(a - b) >= epsilon for a, b in zip(position, last))
+
+# Per-field state of an element as the client sees it.
+def element_fields(element) -> dict:
+    t = element.transform
+    return {
+        'position': _vec(t.position),
+        'rotation': _vec(t.rotation),
+        'scale': _vec(t.scale),
+        'color': element.color,
+        'active': getattr(element, 'active', None),
+        'asset': element.asset,
+    }
+
+
+# Remembers the last state sent for each element key and reports which fields
+# changed since then, so unchanged transforms, colors and assets are not resent.
+# Position has a deadband against the last position sent, like SceneStore.flush,
+# so jitter smaller than epsilon is never sent.
+class DeltaEncoder:
+    def __init__(self, epsilon: float = POSITION_EPSILON):
+        self.epsilon = epsilon
+        self.sent: dict[str, dict] = {}
+
+    def diff(self, element) -> dict:
+        fields = element_fields(element)
+        last = self.sent.get(element.key)
+        if last is None:
+            return fields
+
+        changed = {}
+        for name, value in fields.items():
+            if name == 'asset':
+                # A cleared asset means "keep what the client already has".
+                if value is not None and value is not last['asset']:
+                    changed[name] = value
+            elif name == 'position':
+                if _moved(value, last[name], self.epsilon):
+                    changed[name] = value
+            elif value != last[name]:
+                changed[name] = value
+        return changed
+
+    def commit(self, key: str, changed: dict):
+        last = self.sent.setdefault(key, {'asset': None})
+        for name, value in changed.items():
+            if name != 'asset' or value is not None:
+                last[name] = value
+
+    def forget(self, key: str):
+        self.sent.pop(key, None)
+
+
+# Approximate wire size of a set of fields, used to compare full and delta updates.
+def payload_size(fields: dict) -> int:
+    body = {}
+    size = 0
+    for name, value in fields.items():
+        if name == 'asset':
+            if value is not None:
+                size += len(getattr(value, 'raw', b'') or b'')
+        elif name == 'position' and value is not None:
+            body[name] = [round(c, 4) for c in value]
+        elif value is not None:
+            body[name] = list(value) if not isinstance(value, (int, float)) else value
+    return size + len(json.dumps(body, separators=(',', ':')))
@@ -0,0 +1,139 @@
+import numpy as np
+from xarp.gestures import INDEX_TIP
+from xarp.spatial import Vector3
+
+from hands import hand_features
+
+SPHERE, PLANE, DISC = 0, 1, 2
+ENTER, EXIT, DROP = 'enter', 'exit', 'drop'
+
+
+def _grow(a: np.ndarray, n: int) -> np.ndarray:
+    out = np.zeros((n,) + a.shape[1:], dtype=a.dtype)
+    out[:len(a)] = a
+    return out
+
+
+# Targets that a right hand joint is tested against along the segment it moved
+# since the previous frame, all in one vectorized pass per frame, so a fast move
+# or a low frame rate cannot step over a target between two samples. Each
+# target follows one joint (the index fingertip by default). Shapes:
+#   sphere  inside within radius of center
+#   plane   inside on or behind the plane (against its normal)
+#   disc    inside behind the plane within radius of the axis through center;
+#           only entered by crossing from the front or by appearing inside
+# A target is hit in a frame if the segment touched it. Hits fire ENTER, and
+# leaving fires EXIT (both in one frame when the joint passed straight through).
+# drop() fires DROP for a target the joint touched; callers decide when to ask.
+class DropTargets:
+    def __init__(self, capacity: int = 8):
+        self.rows: dict[str, int] = {}
+        self.keys: list[str] = []
+        self.shape = np.zeros(capacity, dtype=np.int8)
+        self.joint = np.zeros(capacity, dtype=np.int64)
+        self.center = np.zeros((capacity, 3))
+        self.normal = np.zeros((capacity, 3))
+        self.radius = np.zeros(capacity)
+        self.inside = np.zeros(capacity, dtype=bool)
+        self.hits = np.zeros(capacity, dtype=bool)
+        self.previous: np.ndarray | None = None
+        self.listeners: dict[str, list] = {}
+
+    def sphere(self, key: str, center: Vector3, radius: float, joint: int = INDEX_TIP):
+        self._add(key, SPHERE, joint, center, Vector3.up(), radius)
+
+    def plane(self, key: str, point: Vector3, normal: Vector3, joint: int = INDEX_TIP):
+        self._add(key, PLANE, joint, point, normal, 0.0)
+
+    def disc(self, key: str, center: Vector3, normal: Vector3, radius: float, joint: int = INDEX_TIP):
+        self._add(key, DISC, joint, center, normal, radius)
+
+    def _add(self, key: str, shape: int, joint: int, center: Vector3, normal: Vector3, radius: float):
+        row = self.rows.get(key)
+        if row is None:
+            row = self.rows[key] = len(self.keys)
+            self.keys.append(key)
+            if row == len(self.shape):
+                n = 2 * row
+                self.shape, self.joint, self.radius = _grow(self.shape, n), _grow(self.joint, n), _grow(self.radius, n)
+                self.center, self.normal = _grow(self.center, n), _grow(self.normal, n)
+                self.inside, self.hits = _grow(self.inside, n), _grow(self.hits, n)
+        n = normal.to_numpy()
+        self.shape[row] = shape
+        self.joint[row] = joint
+        self.center[row] = center.to_numpy()
+        self.normal[row] = n / np.linalg.norm(n)
+        self.radius[row] = radius
+        self.inside[row] = False
+
+    def move(self, key: str, center: Vector3):
+        self.center[self.rows[key]] = center.to_numpy()
+
+    # Call callback(key) whenever event fires for a target.
+    def on(self, event: str, callback):
+        self.listeners.setdefault(event, []).append(callback)
+
+    def update(self, frame: dict):
+        count = len(self.keys)
+        self.hits[:count] = False
+        right = hand_features(frame).right
+        if right is None:
+            # Start the next segment where the hand reappears, not where it was lost.
+            self.previous = None
+            return
+        joints = right.joints
+        previous = joints if self.previous is None else self.previous
+        self.previous = joints.copy()
+        if not count:
+            return
+
+        shape, center, normal, radius = self.shape[:count], self.center[:count], self.normal[:count], self.radius[:count]
+        p0, p1 = previous[self.joint[:count]], joints[self.joint[:count]]
+        d = p1 - p0
+
+        # Spheres: closest point of the segment to the center.
+        t = np.clip(np.einsum('ij,ij->i', center - p0, d) / np.maximum(np.einsum('ij,ij->i', d, d), 1e-12), 0, 1)
+        sphere_hit = np.linalg.norm(p0 + d * t[:, None] - center, axis=1) < radius
+        sphere_in = np.linalg.norm(p1 - center, axis=1) < radius
+
+        # Planes and discs: signed distances of both ends from the plane.
+        s0 = np.einsum('ij,ij->i', p0 - center, normal)
+        s1 = np.einsum('ij,ij->i', p1 - center, normal)
+        plane_in = s1 <= 0
+        plane_hit = plane_in | (s0 <= 0)
+
+        crossing = (s0 > 0) & (s1 <= 0)
+        u = np.where(crossing, s0 / np.where(crossing, s0 - s1, 1), 0)
+        # Where a crossing segment meets the plane, relative to the center.
+        through = p0 + d * u[:, None] - center
+        crossed_within = np.linalg.norm(through, axis=1) <= radius
+        below = p1 - center - s1[:, None] * normal
+        disc_in = plane_in & (np.linalg.norm(below, axis=1) <= radius)
+        disc_hit = disc_in | (crossing & crossed_within)
+
+        hit = np.select([shape == SPHERE, shape == PLANE], [sphere_hit, plane_hit], disc_hit)
+        inside = np.select([shape == SPHERE, shape == PLANE], [sphere_in, plane_in], disc_in)
+
+        was = self.inside[:count].copy()
+        self.hits[:count] = hit
+        self.inside[:count] = inside
+        entered = hit & ~was
+        exited = (was | entered) & ~inside
+        for event, fired in ((ENTER, entered), (EXIT, exited)):
+            for callback in self.listeners.get(event, ()):
+                for row in np.flatnonzero(fired):
+                    callback(self.keys[row])
+
+    # Whether the joint touched a target since the previous frame.
+    def hit(self, key: str) -> bool:
+        return bool(self.hits[self.rows[key]])
+
+    # Whether the joint touched a target since the previous frame, firing DROP if
+    # so. Call it on the frame something is let go to drop it where it was
+    # released, or on every frame it is held to drop it on contact.
+    def drop(self, key: str) -> bool:
+        if not self.hit(key):
+            return False
+        for callback in self.listeners.get(DROP, ()):
+            callback(key)
+        return True
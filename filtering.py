@@ -0,0 +1,67 @@
+import math
+import time
+
+import numpy as np
+
+SIDES = ('left', 'right')
+
+
+def _alpha(dt: np.ndarray, cutoff: np.ndarray) -> np.ndarray:
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+# One Euro filter over the joints of both hands at once. Slow motion is smoothed
+# heavily to remove tracking jitter; the cutoff rises with each joint's speed so
+# fast motion stays responsive. With a horizon set, the output is extrapolated
+# along the filtered velocity to make up for pipeline latency.
+class HandFilter:
+    def __init__(self, min_cutoff: float = 1.0, beta: float = 10.0, d_cutoff: float = 1.0,
+                 horizon: float = 0.0, clock = time.monotonic):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        # Seconds to predict ahead.
+        self.horizon = horizon
+        self.clock = clock
+
+        self.x: np.ndarray | None = None
+        self.dx: np.ndarray | None = None
+        self.t = np.zeros(len(SIDES))
+        self.tracked = np.zeros(len(SIDES), dtype=bool)
+
+    # Filter the (hands, joints, 3) positions of the hands named in sides.
+    def __call__(self, sides: list[str], joints: np.ndarray, t: float | None = None) -> np.ndarray:
+        t = self.clock() if t is None else t
+        rows = np.array([SIDES.index(side) for side in sides])
+        if self.x is None or self.x.shape[1:] != joints.shape[1:]:
+            self.x = np.zeros((len(SIDES),) + joints.shape[1:])
+            self.dx = np.zeros_like(self.x)
+            self.tracked[:] = False
+
+        # A hand that was lost starts over from its raw position. Untracked
+        # sides are forgotten so they also restart when they reappear.
+        fresh = ~self.tracked[rows]
+        lost = np.setdiff1d(np.arange(len(SIDES)), rows)
+        self.tracked[lost] = False
+        self.x[rows[fresh]] = joints[fresh]
+        self.dx[rows[fresh]] = 0.0
+        self.t[rows[fresh]] = t
+        self.tracked[rows] = True
+
+        live = rows[~fresh]
+        if len(live):
+            x = joints[~fresh]
+            dt = np.maximum(t - self.t[live], 1e-4)[:, None, None]
+            dx = (x - self.x[live]) / dt
+            self.dx[live] += _alpha(dt, self.d_cutoff) * (dx - self.dx[live])
+
+            speed = np.linalg.norm(self.dx[live], axis=2, keepdims=True)
+            cutoff = self.min_cutoff + self.beta * speed
+            self.x[live] += _alpha(dt, cutoff) * (x - self.x[live])
+            self.t[live] = t
+
+        out = self.x[rows]
+        if self.horizon > 0:
+            out = out + self.dx[rows] * self.horizon
+        return out.copy()
@@ -0,0 +1,88 @@
+import time
+
+from hands import HandState, hand_features
+
+PINCH_START, PINCH_END, OPEN_ENTER, OPEN_EXIT = 'pinch_start', 'pinch_end', 'open_enter', 'open_exit'
+
+
+# Gesture state of one hand, with this frame's edge events.
+class HandGestures:
+    def __init__(self):
+        self.pinching = False
+        self.open = False
+        self.pinch_start = False
+        self.pinch_end = False
+        self.open_enter = False
+        self.open_exit = False
+        self.pinch_since = 0.0
+        self.pinch_duration = 0.0
+        # Feature values when the gesture began, used as hysteresis anchors.
+        self._pinch_distance = 0.0
+        self._openness = 0.0
+
+
+# Evaluates xarp's pinch/open_hand classifiers once per hand per frame and turns
+# them into stable states with edge events. A gesture starts when xarp's
+# classifier fires but only ends once the underlying measurement has moved back
+# by a margin (pinch distance opening up, fingertips closing in), so a pinch
+# hovering at the classifier's threshold no longer flickers on and off.
+class GestureTracker:
+    def __init__(self, release_margin: float = 0.015, open_margin: float = 0.01, clock = time.monotonic):
+        self.release_margin = release_margin
+        self.open_margin = open_margin
+        self.clock = clock
+        self.left = HandGestures()
+        self.right = HandGestures()
+        self.listeners: dict[str, list] = {}
+
+    # Call callback(side, gestures) whenever event fires for either hand.
+    def on(self, event: str, callback):
+        self.listeners.setdefault(event, []).append(callback)
+
+    def update(self, frame: dict) -> 'GestureTracker':
+        features = hand_features(frame)
+        now = frame.get('time')
+        if now is None:
+            now = self.clock()
+        self._update('left', self.left, features.left, now)
+        self._update('right', self.right, features.right, now)
+        frame['gestures'] = self
+        return self
+
+    def _update(self, side: str, g: HandGestures, hand: HandState | None, now: float):
+        g.pinch_start = g.pinch_end = g.open_enter = g.open_exit = False
+        if hand is None:
+            # Keep the last state while the hand is not tracked.
+            return
+
+        if not g.pinching and hand.pinch:
+            g.pinching = g.pinch_start = True
+            g.pinch_since = now
+            g._pinch_distance = hand.pinch_distance
+        elif g.pinching and not hand.pinch and hand.pinch_distance > g._pinch_distance + self.release_margin:
+            g.pinching = False
+            g.pinch_end = True
+        g.pinch_duration = now - g.pinch_since if g.pinching else 0.0
+
+        if not g.open and hand.open_hand:
+            g.open = g.open_enter = True
+            g._openness = hand.openness
+        elif g.open and not hand.open_hand and hand.openness < g._openness - self.open_margin:
+            g.open = False
+            g.open_exit = True
+
+        for event, fired in ((PINCH_START, g.pinch_start), (PINCH_END, g.pinch_end),
+                             (OPEN_ENTER, g.open_enter), (OPEN_EXIT, g.open_exit)):
+            if fired:
+                for callback in self.listeners.get(event, ()):
+                    callback(side, g)
+
+
+# Whether the right hand is pinching this frame, using the tracker's stable
+# state when main has updated one for the frame.
+def right_pinching(frame: dict) -> bool:
+    tracker = frame.get('gestures')
+    if tracker is not None:
+        return tracker.right.pinching
+    right = hand_features(frame).right
+    return bool(right and right.pinch)
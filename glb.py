@@ -0,0 +1,421 @@
+import io
+import json
+import struct
+import sys
+
+import numpy as np
+from PIL import Image
+
+GLB_MAGIC = b'glTF'
+JSON_CHUNK = 0x4E4F534A
+BIN_CHUNK = 0x004E4942
+
+ARRAY_BUFFER = 34962
+ELEMENT_ARRAY_BUFFER = 34963
+TRIANGLES = 4
+
+COMPONENTS = {5120: np.int8, 5121: np.uint8, 5122: np.int16, 5123: np.uint16, 5125: np.uint32, 5126: np.float32}
+COMPONENT_TYPES = {np.dtype(dtype): ctype for ctype, dtype in COMPONENTS.items()}
+TYPES = {'SCALAR': 1, 'VEC2': 2, 'VEC3': 3, 'VEC4': 4, 'MAT2': 4, 'MAT3': 9, 'MAT4': 16}
+TYPE_NAMES = {1: 'SCALAR', 2: 'VEC2', 3: 'VEC3', 4: 'VEC4'}
+
+# Apparent size in pixels each level of detail is built for, from full detail
+# down. Meshes are clustered to a grid of half that many cells across and
+# textures are limited to that many pixels on a side.
+LOD_PIXELS = (None, 1024, 512, 256, 128)
+
+# Attributes only needed for skinning and morphing, which are stripped with the
+# animations that drive them.
+_ANIMATION_ATTRIBUTES = ('JOINTS_', 'WEIGHTS_')
+
+
+def parse(raw: bytes) -> tuple[dict, bytes]:
+    magic, version, length = struct.unpack_from('<4sII', raw, 0)
+    if magic != GLB_MAGIC or version != 2:
+        raise ValueError("not a glTF 2.0 binary")
+    doc, binary = None, b''
+    offset = 12
+    while offset < length:
+        size, kind = struct.unpack_from('<II', raw, offset)
+        chunk = raw[offset + 8:offset + 8 + size]
+        if kind == JSON_CHUNK:
+            doc = json.loads(chunk)
+        elif kind == BIN_CHUNK:
+            binary = chunk
+        offset += 8 + size
+    if doc is None:
+        raise ValueError("GLB has no JSON chunk")
+    return doc, binary
+
+def dump(doc: dict, binary: bytes) -> bytes:
+    text = json.dumps(doc, separators=(',', ':')).encode()
+    text += b' ' * (-len(text) % 4)
+    binary += b'\0' * (-len(binary) % 4)
+    length = 12 + 8 + len(text) + (8 + len(binary) if binary else 0)
+    out = struct.pack('<4sII', GLB_MAGIC, 2, length) + struct.pack('<II', len(text), JSON_CHUNK) + text
+    if binary:
+        out += struct.pack('<II', len(binary), BIN_CHUNK) + binary
+    return out
+
+
+def read_accessor(doc: dict, binary: bytes, index: int) -> np.ndarray:
+    accessor = doc['accessors'][index]
+    if 'sparse' in accessor:
+        raise ValueError("sparse accessors are not supported")
+    dtype = np.dtype(COMPONENTS[accessor['componentType']])
+    width = TYPES[accessor['type']]
+    count = accessor['count']
+    if 'bufferView' not in accessor:
+        return np.zeros((count, width), dtype=dtype)
+    view = doc['bufferViews'][accessor['bufferView']]
+    if view.get('buffer', 0) != 0:
+        raise ValueError("external buffers are not supported")
+    offset = view.get('byteOffset', 0) + accessor.get('byteOffset', 0)
+    stride = view.get('byteStride') or dtype.itemsize * width
+    return np.ndarray((count, width), dtype, binary, offset, (stride, dtype.itemsize)).copy()
+
+def _view_bytes(doc: dict, binary: bytes, index: int) -> bytes:
+    view = doc['bufferViews'][index]
+    offset = view.get('byteOffset', 0)
+    return binary[offset:offset + view['byteLength']]
+
+
+# Builds the binary chunk, buffer views and accessors of the optimized file.
+class _Writer:
+    def __init__(self):
+        self.binary = bytearray()
+        self.views: list[dict] = []
+        self.accessors: list[dict] = []
+
+    def view(self, data: bytes, target: int | None = None, stride: int | None = None) -> int:
+        self.binary += b'\0' * (-len(self.binary) % 4)
+        view = {'buffer': 0, 'byteOffset': len(self.binary), 'byteLength': len(data)}
+        if target is not None:
+            view['target'] = target
+        if stride is not None:
+            view['byteStride'] = stride
+        self.binary += data
+        self.views.append(view)
+        return len(self.views) - 1
+
+    def accessor(self, array: np.ndarray, target: int, normalized: bool = False, bounds: bool = False) -> int:
+        array = np.ascontiguousarray(array)
+        width = array.shape[1] if array.ndim > 1 else 1
+        row = array.itemsize * width
+        stride = None
+        data = array.tobytes()
+        if target == ARRAY_BUFFER and row % 4:
+            # Vertex attribute elements must start on 4-byte boundaries.
+            stride = row + (-row % 4)
+            padded = np.zeros((len(array), stride), np.uint8)
+            padded[:, :row] = array.reshape(len(array), -1).view(np.uint8)
+            data = padded.tobytes()
+        accessor = {
+            'bufferView': self.view(data, target, stride),
+            'componentType': COMPONENT_TYPES[array.dtype],
+            'count': len(array),
+            'type': TYPE_NAMES[width],
+        }
+        if normalized:
+            accessor['normalized'] = True
+        if bounds:
+            accessor['min'] = array.reshape(len(array), -1).min(axis=0).tolist()
+            accessor['max'] = array.reshape(len(array), -1).max(axis=0).tolist()
+        self.accessors.append(accessor)
+        return len(self.accessors) - 1
+
+
+# Merge vertices that fall in the same cell of a grid of the given cell size,
+# and drop the triangles that collapse. Returns the original vertex kept for
+# each cell, the new triangles and the mean position of each cell.
+def cluster(positions: np.ndarray, triangles: np.ndarray, cell: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    lo = positions.min(axis=0)
+    cells = np.floor((positions - lo) / cell).astype(np.int64)
+    _, first, inverse = np.unique(cells, axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+
+    triangles = inverse[triangles]
+    a, b, c = triangles.T
+    triangles = triangles[(a != b) & (b != c) & (a != c)]
+    # Drop duplicates, comparing triangles rotated to start at their smallest
+    # index so winding (and with it double-sided geometry) is kept.
+    start = np.argmin(triangles, axis=1)[:, None]
+    rotated = np.take_along_axis(triangles, (start + np.arange(3)) % 3, axis=1)
+    _, unique = np.unique(rotated, axis=0, return_index=True)
+    triangles = rotated[np.sort(unique)]
+
+    sums = np.zeros((len(first), positions.shape[1]))
+    np.add.at(sums, inverse, positions)
+    means = sums / np.bincount(inverse, minlength=len(first))[:, None]
+    return first, triangles, means
+
+# Keep only the vertices the indices use.
+def compact(indices: np.ndarray, attributes: dict[str, np.ndarray]) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    used = np.unique(indices)
+    remap = np.full(len(next(iter(attributes.values()))), -1, dtype=np.int64)
+    remap[used] = np.arange(len(used))
+    return remap[indices], {name: values[used] for name, values in attributes.items()}
+
+# Attributes stored as normalized integers under KHR_mesh_quantization.
+def quantize(name: str, values: np.ndarray) -> tuple[np.ndarray, bool]:
+    if values.dtype != np.float32:
+        return values, False
+    if name in ('NORMAL', 'TANGENT'):
+        return np.round(np.clip(values, -1, 1) * 127).astype(np.int8), True
+    if name.startswith('TEXCOORD_') and values.min() >= 0 and values.max() <= 1:
+        return np.round(values * 65535).astype(np.uint16), True
+    return values, False
+
+
+def _resample_image(data: bytes, mime: str, size: int) -> bytes:
+    image = Image.open(io.BytesIO(data))
+    if max(image.size) <= size:
+        return data
+    image.thumbnail((size, size), Image.Resampling.LANCZOS)
+    out = io.BytesIO()
+    if mime == 'image/jpeg':
+        image.convert('RGB').save(out, format='JPEG', quality=85, optimize=True)
+    else:
+        image.save(out, format='PNG', optimize=True)
+    return out.getvalue()
+
+
+def _node_matrix(node: dict) -> np.ndarray:
+    if 'matrix' in node:
+        return np.array(node['matrix'], dtype=np.float64).reshape(4, 4).T
+    x, y, z, w = node.get('rotation', (0, 0, 0, 1))
+    rotation = np.array([
+        [1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)],
+        [2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)],
+        [2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)],
+    ])
+    matrix = np.eye(4)
+    matrix[:3, :3] = rotation * np.array(node.get('scale', (1, 1, 1)))
+    matrix[:3, 3] = node.get('translation', (0, 0, 0))
+    return matrix
+
+def _scene_roots(doc: dict) -> list[int]:
+    scenes = doc.get('scenes')
+    if not scenes:
+        return list(range(len(doc.get('nodes', []))))
+    return scenes[doc.get('scene', 0)].get('nodes', [])
+
+# Diagonal in meters of the model's bounding box as rendered at scale 1, and
+# the largest scale each mesh is rendered at.
+def _bounds(doc: dict) -> tuple[float, dict[int, float]]:
+    corners = []
+    scales: dict[int, float] = {}
+    stack = [(root, np.eye(4)) for root in _scene_roots(doc)]
+    while stack:
+        index, parent = stack.pop()
+        node = doc['nodes'][index]
+        matrix = parent @ _node_matrix(node)
+        for child in node.get('children', []):
+            stack.append((child, matrix))
+        if 'mesh' not in node:
+            continue
+        scale = float(np.linalg.norm(matrix[:3, :3], axis=0).max())
+        scales[node['mesh']] = max(scales.get(node['mesh'], 0.0), scale)
+        for primitive in doc['meshes'][node['mesh']]['primitives']:
+            accessor = doc['accessors'][primitive['attributes']['POSITION']]
+            lo, hi = accessor['min'], accessor['max']
+            box = np.array([[x, y, z, 1] for x in (lo[0], hi[0]) for y in (lo[1], hi[1]) for z in (lo[2], hi[2])])
+            corners.append((box @ matrix.T)[:, :3])
+    if not corners:
+        return 0.0, scales
+    corners = np.concatenate(corners)
+    return float(np.linalg.norm(corners.max(axis=0) - corners.min(axis=0))), scales
+
+def model_size(raw: bytes) -> float:
+    return _bounds(parse(raw)[0])[0]
+
+# Coarsest level of detail that still holds up for a model that appears pixels
+# pixels across.
+def lod_for(pixels: float) -> int:
+    lod = 0
+    for level, size in enumerate(LOD_PIXELS[1:], 1):
+        if size >= pixels:
+            lod = level
+    return lod
+
+
+# Rewrite a GLB with only what its default scene renders: unreachable nodes,
+# other scenes, animations, skins, cameras and unused meshes, materials,
+# textures and images are dropped, vertices no primitive uses are removed and
+# indices are narrowed where they fit. At lod > 0 meshes are decimated by
+# vertex clustering and textures downsampled. quantize stores normals, tangents
+# and texture coordinates as normalized integers (KHR_mesh_quantization), which
+# the client must support. Files needing extensions are returned unchanged.
+def optimize(raw: bytes, lod: int = 0, quantize_attributes: bool = False) -> bytes:
+    doc, binary = parse(raw)
+    if doc.get('extensionsRequired'):
+        return raw
+    pixels = LOD_PIXELS[lod]
+    out = _Writer()
+    if pixels is not None:
+        # The grid is laid out over the whole model so every mesh is simplified alike.
+        size, mesh_scales = _bounds(doc)
+        cell = size / (pixels // 2)
+
+    nodes: list[int] = []
+    node_map: dict[int, int] = {}
+    pending = list(_scene_roots(doc))
+    while pending:
+        index = pending.pop(0)
+        if index in node_map:
+            continue
+        node_map[index] = len(nodes)
+        nodes.append(index)
+        pending.extend(doc['nodes'][index].get('children', []))
+
+    mesh_map: dict[int, int] = {}
+    material_map: dict[int, int] = {}
+    texture_map: dict[int, int] = {}
+    image_map: dict[int, int] = {}
+    sampler_map: dict[int, int] = {}
+    shared: dict[int, int] = {}
+    quantized = False
+
+    def remap(table: dict, index: int) -> int:
+        return table.setdefault(index, len(table))
+
+    def copy_accessor(index: int, target: int) -> int:
+        if index not in shared:
+            accessor = doc['accessors'][index]
+            shared[index] = out.accessor(read_accessor(doc, binary, index), target,
+                                         accessor.get('normalized', False), 'min' in accessor)
+        return shared[index]
+
+    new_meshes = []
+    new_nodes = []
+    for index in nodes:
+        node = {k: v for k, v in doc['nodes'][index].items() if k not in ('skin', 'camera', 'weights')}
+        if 'children' in node:
+            node['children'] = [node_map[child] for child in node['children']]
+        if 'mesh' in node:
+            if node['mesh'] not in mesh_map:
+                mesh_map[node['mesh']] = len(new_meshes)
+                new_meshes.append(None)
+                mesh = doc['meshes'][node['mesh']]
+                primitives = []
+                for primitive in mesh['primitives']:
+                    attributes = {name: accessor for name, accessor in primitive['attributes'].items()
+                                  if not name.startswith(_ANIMATION_ATTRIBUTES)}
+                    new = {k: v for k, v in primitive.items() if k not in ('attributes', 'indices', 'targets')}
+                    if 'material' in primitive:
+                        new['material'] = remap(material_map, primitive['material'])
+
+                    if primitive.get('mode', TRIANGLES) != TRIANGLES or 'POSITION' not in attributes:
+                        new['attributes'] = {name: copy_accessor(a, ARRAY_BUFFER) for name, a in attributes.items()}
+                        if 'indices' in primitive:
+                            new['indices'] = copy_accessor(primitive['indices'], ELEMENT_ARRAY_BUFFER)
+                        primitives.append(new)
+                        continue
+
+                    values = {name: read_accessor(doc, binary, a) for name, a in attributes.items()}
+                    normalized = {name: doc['accessors'][a].get('normalized', False) for name, a in attributes.items()}
+                    count = len(values['POSITION'])
+                    if 'indices' in primitive:
+                        indices = read_accessor(doc, binary, primitive['indices']).reshape(-1).astype(np.int64)
+                    else:
+                        indices = np.arange(count, dtype=np.int64)
+
+                    if pixels is not None and len(indices) >= 3:
+                        positions = values['POSITION'].astype(np.float64)
+                        triangles = indices[:len(indices) // 3 * 3].reshape(-1, 3)
+                        first, triangles, means = cluster(positions, triangles, cell / max(mesh_scales[node['mesh']], 1e-12))
+                        values = {name: v[first] for name, v in values.items()}
+                        if values['POSITION'].dtype == np.float32:
+                            values['POSITION'] = means.astype(np.float32)
+                        indices = triangles.reshape(-1)
+                    indices, values = compact(indices, values)
+                    if not len(indices):
+                        continue
+
+                    new['attributes'] = {}
+                    for name, v in values.items():
+                        if quantize_attributes:
+                            v, now_normalized = quantize(name, v)
+                            quantized |= now_normalized
+                            normalized[name] |= now_normalized
+                        new['attributes'][name] = out.accessor(v, ARRAY_BUFFER, normalized[name], name == 'POSITION')
+                    index_type = np.uint16 if len(values['POSITION']) < 0xFFFF else np.uint32
+                    new['indices'] = out.accessor(indices.astype(index_type), ELEMENT_ARRAY_BUFFER)
+                    primitives.append(new)
+                new_meshes[mesh_map[node['mesh']]] = {k: v for k, v in mesh.items() if k not in ('primitives', 'weights')} | {'primitives': primitives}
+            node['mesh'] = mesh_map[node['mesh']]
+        new_nodes.append(node)
+
+    def retarget(value):
+        # Texture references anywhere in a material are {"index": n, ...} objects.
+        if isinstance(value, dict):
+            value = {k: retarget(v) for k, v in value.items()}
+            if isinstance(value.get('index'), int):
+                value['index'] = remap(texture_map, value['index'])
+            return value
+        if isinstance(value, list):
+            return [retarget(v) for v in value]
+        return value
+
+    new_materials = [None] * len(material_map)
+    for old, new in list(material_map.items()):
+        new_materials[new] = {k: retarget(v) if k != 'name' else v for k, v in doc['materials'][old].items()}
+
+    def resource(value):
+        # Images are referenced by "source" from textures and their extensions.
+        if isinstance(value, dict):
+            value = {k: resource(v) for k, v in value.items()}
+            if isinstance(value.get('source'), int):
+                value['source'] = remap(image_map, value['source'])
+            return value
+        return value
+
+    new_textures = [None] * len(texture_map)
+    for old, new in list(texture_map.items()):
+        texture = resource(doc['textures'][old])
+        if 'sampler' in texture:
+            texture['sampler'] = remap(sampler_map, texture['sampler'])
+        new_textures[new] = texture
+
+    new_images = [None] * len(image_map)
+    for old, new in image_map.items():
+        image = dict(doc['images'][old])
+        if 'bufferView' in image:
+            data = _view_bytes(doc, binary, image['bufferView'])
+            if pixels is not None:
+                data = _resample_image(data, image.get('mimeType', 'image/png'), pixels)
+            image['bufferView'] = out.view(data)
+        new_images[new] = image
+
+    new_samplers = [None] * len(sampler_map)
+    for old, new in sampler_map.items():
+        new_samplers[new] = doc['samplers'][old]
+
+    scene = dict(doc['scenes'][doc.get('scene', 0)]) if doc.get('scenes') else {}
+    scene['nodes'] = [node_map[root] for root in _scene_roots(doc)]
+    result = {'asset': doc['asset'], 'scene': 0, 'scenes': [scene], 'nodes': new_nodes}
+    for key, values in (('meshes', new_meshes), ('materials', new_materials), ('textures', new_textures),
+                        ('images', new_images), ('samplers', new_samplers),
+                        ('accessors', out.accessors), ('bufferViews', out.views)):
+        if values:
+            result[key] = values
+    if out.binary:
+        result['buffers'] = [{'byteLength': len(out.binary) + (-len(out.binary) % 4)}]
+    extensions = list(doc.get('extensionsUsed', []))
+    if quantized:
+        extensions.append('KHR_mesh_quantization')
+        result['extensionsRequired'] = ['KHR_mesh_quantization']
+    if extensions:
+        result['extensionsUsed'] = extensions
+    return dump(result, bytes(out.binary))
+
+
+# Size of each level of detail of the given files, for tuning offline:
+#   python -m glb assets/*.glb
+if __name__ == "__main__":
+    for path in sys.argv[1:]:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        sizes = [len(optimize(raw, lod)) for lod in range(len(LOD_PIXELS))]
+        print(f"{path}: {len(raw)} bytes, {model_size(raw):.3f} m;",
+              ", ".join(f"lod{lod} {size}" for lod, size in enumerate(sizes)))
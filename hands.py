@@ -0,0 +1,115 @@
+import math
+from functools import cached_property
+
+import numpy as np
+from xarp.data_models import Hands
+from xarp.gestures import INDEX_TIP, THUMB_METACARPAL, MIDDLE_METACARPAL, PALM, pinch, open_hand, flat_palm
+from xarp.spatial import Vector3
+
+from filtering import HandFilter
+
+# Joint indices follow the OpenXR hand layout: each finger's tip comes 3 (thumb)
+# or 4 (other fingers) joints after its metacarpal, fingers 5 joints apart.
+THUMB_TIP = THUMB_METACARPAL + 3
+MIDDLE_TIP = INDEX_TIP + 5
+RING_TIP = INDEX_TIP + 10
+LITTLE_TIP = INDEX_TIP + 15
+TIPS = (THUMB_TIP, INDEX_TIP, MIDDLE_TIP, RING_TIP, LITTLE_TIP)
+
+_UP = np.array([0.0, 1.0, 0.0])
+
+
+def hand_array(hand) -> np.ndarray:
+    return np.array([p.position.to_numpy() for p in hand], dtype=np.float64)
+
+
+# Features of one tracked hand. joints is a (joints, 3) array of positions.
+class HandState:
+    def __init__(self, hand, joints: np.ndarray, normal: np.ndarray, up_dot: float,
+                 pinch_distance: float, openness: float):
+        self.hand = hand
+        self.joints = joints
+        self.normal = normal
+        self.up_dot = up_dot
+        self.pinch_distance = pinch_distance
+        self.openness = openness
+
+    @property
+    def palm(self) -> np.ndarray:
+        return self.joints[PALM]
+
+    @property
+    def index_tip(self) -> np.ndarray:
+        return self.joints[INDEX_TIP]
+
+    @property
+    def tips(self) -> np.ndarray:
+        return self.joints[list(TIPS)]
+
+    # Distance from the index fingertip to a point in the scene.
+    def reach(self, point: Vector3) -> float:
+        return math.dist(self.joints[INDEX_TIP], point.to_numpy())
+
+    # xarp's classifiers, evaluated at most once per frame.
+    @cached_property
+    def pinch(self) -> bool:
+        return pinch(self.hand)
+
+    @cached_property
+    def open_hand(self) -> bool:
+        return open_hand(self.hand)
+
+    @cached_property
+    def flat_palm(self) -> bool:
+        return flat_palm(self.hand)
+
+
+# Converts both hands of a sensed frame into joint arrays once and computes palm
+# normal, up-dot, pinch distance, openness and fingertips for both in one pass.
+# With a smoother, positions and the palm normal come from filtered joints, while
+# pinch distance and openness stay on the raw joints xarp's classifiers read, so
+# a gesture starts and ends on the same measurements.
+class HandFeatures:
+    def __init__(self, hands: Hands, smoother: HandFilter | None = None, t: float | None = None):
+        self.hands = hands
+        self.left: HandState | None = None
+        self.right: HandState | None = None
+
+        present = [(side, hand) for side, hand in (('left', hands.left), ('right', hands.right)) if hand]
+        if not present:
+            return
+
+        raw = joints = np.stack([hand_array(hand) for _, hand in present])
+        if smoother is not None:
+            joints = smoother([side for side, _ in present], joints, t)
+        palm = joints[:, PALM]
+
+        crossed = np.cross(joints[:, MIDDLE_METACARPAL] - palm, joints[:, THUMB_METACARPAL] - palm)
+        norm = np.linalg.norm(crossed, axis=1, keepdims=True)
+        normal = np.divide(crossed, norm, out=crossed.copy(), where=norm != 0)
+        up_dot = normal @ _UP
+
+        pinch_distance = np.linalg.norm(raw[:, THUMB_TIP] - raw[:, INDEX_TIP], axis=1)
+        openness = np.linalg.norm(raw[:, list(TIPS[1:])] - raw[:, PALM, None], axis=2).mean(axis=1)
+
+        for i, (side, hand) in enumerate(present):
+            setattr(self, side, HandState(
+                hand, joints[i], normal[i], float(up_dot[i]),
+                float(pinch_distance[i]), float(openness[i]),
+            ))
+
+
+# Compute a frame's hand features from filtered joints; later hand_features
+# calls for the frame return them. Recorded and scripted frames carry their
+# capture time in frame['time'], so filtering does not depend on replay speed.
+def filter_hands(frame: dict, smoother: HandFilter) -> HandFeatures:
+    features = frame['hand_features'] = HandFeatures(frame['hands'], smoother, frame.get('time'))
+    return features
+
+# Hand features for a sensed frame, computed on first use and reused by every
+# consumer of the same frame.
+def hand_features(frame: dict) -> HandFeatures:
+    features = frame.get('hand_features')
+    if features is None:
+        features = frame['hand_features'] = HandFeatures(frame['hands'])
+    return features
@@ -0,0 +1,93 @@
+import math
+
+import numpy as np
+from xarp.entities import Element
+
+from hands import hand_features
+
+
+# Uniform grid over element positions for pinch hit-testing. Each element has
+# its own grab radius; a query only looks at the grid cells that can hold an
+# element within the largest radius, so its cost does not grow with the scene.
+# Elements hidden through their active flag are never hit.
+class HitIndex:
+    def __init__(self, cell: float = 0.2):
+        self.cell = cell
+        self.cells: dict[tuple, set[str]] = {}
+        self.elements: dict[str, Element] = {}
+        self.radii: dict[str, float] = {}
+        self.positions: dict[str, np.ndarray] = {}
+        self.cell_of: dict[str, tuple] = {}
+        self.max_radius = 0.0
+
+    def _cell(self, p: np.ndarray) -> tuple:
+        return (math.floor(p[0] / self.cell), math.floor(p[1] / self.cell), math.floor(p[2] / self.cell))
+
+    def add(self, element: Element, radius: float):
+        self.elements[element.key] = element
+        self.radii[element.key] = radius
+        self.max_radius = max(self.max_radius, radius)
+        self.move(element)
+
+    def remove(self, element: Element):
+        key = element.key
+        if key not in self.elements:
+            return
+        self.cells[self.cell_of.pop(key)].discard(key)
+        del self.elements[key], self.radii[key], self.positions[key]
+
+    # Re-read an element's position after it moved.
+    def move(self, element: Element):
+        key = element.key
+        if key not in self.elements:
+            return
+        p = np.array(element.transform.position.to_numpy(), dtype=np.float64)
+        self.positions[key] = p
+
+        cell = self._cell(p)
+        old = self.cell_of.get(key)
+        if old == cell:
+            return
+        if old is not None:
+            self.cells[old].discard(key)
+        self.cells.setdefault(cell, set()).add(key)
+        self.cell_of[key] = cell
+
+    # SceneBatcher observer hook: keep positions current as moves are sent.
+    def moved(self, element: Element):
+        self.move(element)
+
+    # Keys of elements whose grab radius contains point, with their distances.
+    def query(self, point: np.ndarray) -> dict[str, float]:
+        reach = max(1, math.ceil(self.max_radius / self.cell))
+        cx, cy, cz = self._cell(point)
+        found = {}
+        for x in range(cx - reach, cx + reach + 1):
+            for y in range(cy - reach, cy + reach + 1):
+                for z in range(cz - reach, cz + reach + 1):
+                    for key in self.cells.get((x, y, z), ()):
+                        if not getattr(self.elements[key], 'active', True):
+                            continue
+                        d = math.dist(point, self.positions[key])
+                        if d < self.radii[key]:
+                            found[key] = d
+        return found
+
+    # Elements under the right index fingertip for this frame, computed once per frame.
+    def hits(self, frame: dict) -> dict[str, float]:
+        cached = frame.get('hits')
+        if cached is not None and cached[0] is self:
+            return cached[1]
+        right = hand_features(frame).right
+        found = self.query(right.index_tip) if right else {}
+        frame['hits'] = (self, found)
+        return found
+
+    # Key of the closest element under the fingertip among candidate keys, or None.
+    def nearest(self, frame: dict, candidates) -> str | None:
+        found = self.hits(frame)
+        return min((key for key in found if key in candidates), key=found.get, default=None)
+
+    # Whether the fingertip is within an element's grab radius this frame.
+    def touching(self, frame: dict, element: Element) -> bool:
+        return element.key in self.hits(frame)
@@ -1,12 +1,30 @@
 from xarp.express import SyncXR
-from xarp.server import run, show_qrcode_link
-from xarp.entities import Element, ImageAsset, GLBAsset, DefaultAssets, TextAsset
-from xarp.spatial import Transform, Vector3, Pose
-from xarp.gestures import INDEX_TIP, THUMB_METACARPAL, MIDDLE_METACARPAL, pinch, PALM, open_hand, flat_palm
+from xarp.entities import Element, DefaultAssets
+from xarp.spatial import Transform, Vector3
+from xarp.gestures import PALM
 from xarp.spatial import Quaternion
-from xarp.data_models import Hands
-from PIL import Image
+from scene import SceneBatcher
+from store import SceneStore
+from text import Label, text_asset
+from assets import AssetManager, AssetHandle, shared_assets
+from hands import hand_features, filter_hands
+from filtering import HandFilter
+from hittest import HitIndex
+from droptargets import DropTargets
+from replay import RecordingXR
+from telemetry import TELEMETRY
+from anim import Scheduler
+from pipeline import PipelinedXR
+from sensing import AdaptiveXR
+from calibration import TableEstimator, TableCalibration
+from gesture_state import GestureTracker, PINCH_START, right_pinching
+from visibility import Visibility
+from video import VideoPlayer
+from sessions import SessionManager, ENV_METRICS, ENV_MAX_SESSIONS
+from sessionlog import SessionLog, NullLog, session_log
 import math
+import os
+import time
 import numpy as np
 
 from typing import Tuple
@@ -17,211 +35,220 @@ RED = (1,0,0,1)
 TRANSPARENT = (1,1,1,.5)
 INVISIBLE = (0,0,0,0)
 
-GONE: Vector3 = Vector3.from_xyz(0, 9999, 0)
+# Frame rate the original frame-counted timings were tuned at; durations below
+# are expressed as frames / FRAME_RATE seconds.
+FRAME_RATE = 72
 
-def ease_in_out_quad(x: float):
-    return 2 * x * x if x < 0.5 else 1 - ((-2 * x + 2) ** 2) / 2
+# Seconds the wheel stays open before the close gesture tutorial appears.
+WHEEL_TUTORIAL_DELAY = 200 / FRAME_RATE
 
-class LinearAnimElement:
-    def _getpos(self):
-        v: Vector3 = self.end_pos - self.start_pos
-        return self.start_pos + v * ease_in_out_quad(self.frame / self.frames)
-
-    def tick(self):
-        self.frame += 1
-        self.element.transform.position = self._getpos()
-        self.xr.update(self.element)
-        if self.frame > self.frames:
-            self.frame = 0
+# Sensor channels each phase reads; nothing else is requested from the headset.
+CALIBRATION_CHANNELS = {'hands': True}
+INTERACTION_CHANNELS = {'hands': True}
 
+class LinearAnimElement:
     def hide(self):
         self.shown = False
-        self.element.transform.position = GONE
-        self.xr.update(self.element)
+        if self.tween is not None:
+            self.anim.stop(self.tween)
+            self.tween = None
+        self.visibility.hide(self.element)
 
     def show(self):
         self.shown = True
-        self.element.transform.position = self._getpos()
-        self.xr.update(self.element)
+        if self.tween is None:
+            self.tween = self.anim.tween(self.element, self.start_pos, self.end_pos, self.duration)
+        self.visibility.show(self.element, self.anim.position(self.tween))
     
-    def __init__(self, xr: SyncXR, element: Element, frames: int, start_pos: Vector3, end_pos: Vector3):
-        self.xr = xr
+    def __init__(self, visibility: Visibility, anim: Scheduler, element: Element, duration: float, start_pos: Vector3, end_pos: Vector3):
+        self.visibility = visibility
+        self.anim = anim
         self.element = element
-        self.frame = 0
-        self.frames = frames
+        self.duration = duration
         self.start_pos = start_pos
         self.end_pos = end_pos
+        self.tween = None
 
         self.shown = False
 
 
+# Alternates between two elements every period seconds once played.
 class TwoFrameElement:
-    def __init__(self, xr: SyncXR, flip_time: int, one: Element, two: Element):
-        self.xr = xr
+    def __init__(self, visibility: Visibility, anim: Scheduler, period: float, one: Element, two: Element):
+        self.visibility = visibility
+        self.anim = anim
         self.one = one
         self.two = two
-        self.flip_time = flip_time
-        self.frame = 0
+        self.period = period
+        self.flipbook = None
 
-        self.onepos = one.transform.position
-        self.twopos = two.transform.position
-
-        self.one.transform.position = GONE
-        self.two.transform.position = GONE
-
-        self.xr.update(self.one)
-        self.xr.update(self.two)
+        self.visibility.hide(self.one)
+        self.visibility.hide(self.two)
         self.one.asset = None
         self.two.asset = None
         self.destroyed = False
 
-    def inc(self):
-        if self.destroyed:
+    def play(self):
+        if self.destroyed or self.flipbook is not None:
             return
-        
-        if self.frame / self.flip_time == self.frame // self.flip_time:
-            if (self.frame // 10) % 2 == 0:
-                # self.one.active = True
-                # self.two.active = False #in theroy, this makes it invisible
-                self.one.transform.position = self.onepos
-                self.two.transform.position = GONE
-                self.xr.update(self.one)
-                self.xr.update(self.two)
-            else:
-                # self.one.active = False
-                # self.two.active = True
-                self.one.transform.position = GONE
-                self.two.transform.position = self.twopos
-                self.xr.update(self.two)
-                self.xr.update(self.one)
-        self.frame += 1
+        self.flipbook = self.anim.flipbook(self._show, 2, self.period)
+
+    def _show(self, index: int):
+        shown, hidden = (self.one, self.two) if index == 0 else (self.two, self.one)
+        self.visibility.hide(hidden)
+        self.visibility.show(shown)
 
     def destroy(self):
-        self.one.transform.position = GONE
-        self.two.transform.position = GONE
-        self.xr.update(self.one)
-        self.xr.update(self.two)
+        if self.flipbook is not None:
+            self.anim.stop_flipbook(self.flipbook)
+            self.flipbook = None
+        self.visibility.hide(self.one)
+        self.visibility.hide(self.two)
         self.destroyed = True
 
 
-def distance(a: Vector3, b: Vector3):
-    return math.sqrt((a.x - b.x)**2 + (a.y - b.y)**2 + (a.z - b.z)**2)
-
 def sq_horz_mag(v: Vector3):
     return v.x**2 + v.z**2
 
-def sq_mag(v: Vector3):
-    return v.x**2 + v.y**2 + v.z**2
-
-def hand_up_dist(hand: Tuple[Pose, ...]) -> float:
-    n = hand_normal(hand)
-
-    a: Vector3 = Vector3.up()
-    return np.dot(n.to_numpy(), a.to_numpy())
-
-def hand_normal(hand: Tuple[Pose, ...]) -> Vector3:
-    palm = hand[PALM].position
-    index = hand[MIDDLE_METACARPAL].position
-    thumb = hand[THUMB_METACARPAL].position
-
-    a = index - palm
-    b = thumb - palm
-
-    crossed = np.cross(a.to_numpy(), b.to_numpy())
-    norm = np.linalg.norm(crossed)
-    normalized = crossed if norm == 0 else crossed / norm
-    return Vector3(normalized)
-
 #get the vertial position of the table 
-def get_table_pos(xr: SyncXR) -> Vector3:
-    COUNT = 50
-    MESSAGE = f"""
+def get_table_pos(xr: SyncXR, log: SessionLog | NullLog) -> Tuple[Vector3, Vector3, TableCalibration]:
+    MESSAGE = """
         Face forward and place your palms face down on the table in front of you, and your right hand on the wrench.
-        Hold still until the message counts to {COUNT}.
+        Hold still until the message counts to 100%.
         """
 
-    tutorial = Element(
-        key = "tutorial",
-    )
+    # Only the counter line changes while calibrating; the message is sent once.
+    tutorial = Label(xr, "tutorial", MESSAGE)
 
-    lh_pos: Vector3 = Vector3.zero()
-    rh_pos: Vector3 = Vector3.zero()
-    nframes = 0
-    stream = xr.sense(eye=True, hands=True)
+    estimator = TableEstimator()
+    stream = xr.sense(**CALIBRATION_CHANNELS)
     for frame in stream:
+        log.frame(frame)
 
-        hands: Hands = frame['hands']
-        if not (hands.right and hands.left):
-            nframes = 0
+        left, right = hand_features(frame).left, hand_features(frame).right
+        if not (right and left):
             continue
         
-        # tutorial.transform.position = frame['eye'].position + Vector3.from_xyz(0, 0, +0.5)
-        tutorial.transform.position = (hands.left[PALM].position + hands.right[PALM].position) * .5
-        tutorial.transform.position.y += .1
-        tutorial.asset = TextAsset.from_obj(f"Count: {nframes}\n{MESSAGE}")
-        xr.update(tutorial)
-
-        left_down: bool = open_hand(hands.left) and hand_up_dist(hands.left) < -.8
-        right_down: bool = open_hand(hands.right) and hand_up_dist(hands.right) > .8
-
-        if not left_down or not right_down:
-            nframes = 0
-            continue
-
-        y_dist = abs(hands.left[PALM].position.y - hands.right[PALM].position.y)
-        if y_dist > .03:
-            nframes = 0
-            continue
-
-        nframes += 1
-        if nframes > COUNT:
-            lh_pos = hands.left[PALM].position
-            rh_pos = hands.right[PALM].position
+        position = Vector3((left.palm + right.palm) * .5)
+        position.y += .1
+        tutorial.set(f"Count: {round(estimator.progress * 100)}%")
+        tutorial.move(position, frame.get('time'))
+
+        left_down: bool = left.open_hand and left.up_dot < -.8
+        right_down: bool = right.open_hand and right.up_dot > .8
+        y_dist = abs(left.palm[1] - right.palm[1])
+
+        # The normals point opposite ways in the calibration pose (the left one
+        # down, the right one up), so the left one is negated before averaging.
+        estimator.add(left.palm, right.palm, (right.normal - left.normal) * .5,
+                      pose_ok = left_down and right_down and y_dist <= .03)
+        if estimator.converged:
             break
 
-    xr.destroy_element(tutorial)
+    tutorial.destroy()
     stream.close()
-    return lh_pos, rh_pos
 
-def show_wheel(elements: list[Element], origin: Vector3):
-    RADIUS = 0.1
-    for i in range(len(elements)):
-        elements[i].color = WHITE
-
-        angle = i * (2 * math.pi / len(elements)) + (math.pi / 2)
-        x = math.cos(angle) * RADIUS
-        y = math.sin(angle) * RADIUS
-        elements[i].transform.position.x = origin.x + x
-        elements[i].transform.position.y = origin.y + y
-        elements[i].transform.position.z = origin.z
+    table = estimator.result()
+    return Vector3(table.left), Vector3(table.right), table
 
-def hide_wheel(elements: list[Element]):
+def show_wheel(xr: SceneStore, visibility: Visibility, elements: list[Element], origin: Vector3):
+    RADIUS = 0.1
+    angles = np.arange(len(elements)) * (2 * math.pi / len(elements)) + (math.pi / 2)
+    positions = np.tile(origin.to_numpy(), (len(elements), 1))
+    positions[:, 0] += np.cos(angles) * RADIUS
+    positions[:, 1] += np.sin(angles) * RADIUS
+    # Show first: showing restores an element's own position, which the write then replaces.
+    for e in elements:
+        visibility.show(e)
+    xr.write(elements, positions)
+
+def hide_wheel(visibility: Visibility, elements: list[Element]):
     for i in range(len(elements)):
-        elements[i].color = INVISIBLE
-        elements[i].transform.position = Vector3.zero()
+        visibility.hide(elements[i])
+
+# Starts loading every asset main shows. Models given the scale they are shown at
+# get a matching level of detail, and images are resampled for it.
+def load_assets(assets: AssetManager) -> dict[str, AssetHandle]:
+    return {
+        'heart': assets.glb("assets/heart.glb"),
+        'wrench': assets.glb("assets/wrench.glb", scale = 0.005),
+        'allen_wrench': assets.glb("assets/allen_wrench_2.glb", scale = 0.001),
+        'ratchet_wrench': assets.glb("assets/ratchet_wrench.glb", scale = 0.45),
+        'bike_seat': assets.glb("assets/bike_seat.glb", scale = 0.15),
+        'arrow': assets.glb("assets/arrow.glb"),
+
+        'hand_open': assets.glb("assets/hand_open.glb", scale = 0.2),
+        'hand_pinched': assets.glb("assets/hand_pinched.glb", scale = 0.2),
+
+        'wrench_guide': assets.image("assets/wrench_guide.jpg", scale = 2),
+        'allen_wrench_guide': assets.image("assets/allen_wrench_guide.png", scale = 0.4),
+        'ratchet_wrench_guide': assets.image("assets/ratchet_wrench_guide.jpg", scale = 2.5),
+        'bike_seat_diagram': assets.image("assets/bike-seat-diagram.jpg", scale = 0.6),
+    }
 
 def main(xr: SyncXR, params: dict):
-     
+    # XR_RECORD=<dir> saves the sensed stream of each session for replay.py.
+    recorder = None
+    if os.environ.get("XR_RECORD"):
+        xr = recorder = RecordingXR(xr, Path(os.environ["XR_RECORD"]) / time.strftime("session-%Y%m%d-%H%M%S.xrs"))
+
+    # XR_PIPELINE=1 always processes the newest frame and sends updates from a separate thread.
+    pipelined = None
+    if os.environ.get("XR_PIPELINE") == "1":
+        xr = pipelined = PipelinedXR(xr)
+
+    # Frames reach the app at a lower rate while no hand is tracked and nothing animates.
+    sensing = xr = AdaptiveXR(xr)
+
+    # Send each changed element once per sensed frame instead of on every update call.
+    # The store in front of it lets layout and animation move many elements at once.
+    xr = SceneStore(SceneBatcher(xr))
+
+    # XR_LOG=<dir> logs every frame's hand joints and the session's interaction
+    # events for offline analysis with sessionlog.read_log.
+    log = session_log()
+
+    # The log, sender thread and recording are closed however the session ends.
+    try:
+        interact(xr, sensing, log)
+    finally:
+        log.close()
+        if pipelined is not None:
+            pipelined.close()
+        if recorder is not None:
+            recorder.close()
+
+def interact(xr: SceneStore, sensing: AdaptiveXR, log: SessionLog | NullLog):
+    # Elements are shown and hidden through this so only real transitions are sent.
+    visibility = Visibility(xr)
+
+    # Start loading assets now so they decode while the user is calibrating, if
+    # the server has not already loaded them. Loaded assets are shared with any
+    # other session running in this process.
+    assets = load_assets(shared_assets())
+
     # Have the user place their hand on the table to record its postion
-    initial_lh_pos, initial_rh_pos = get_table_pos(xr)
+    initial_lh_pos, initial_rh_pos, table = get_table_pos(xr, log)
+
+    # Drives the tutorial animations and the video flipbook from the frame clock.
+    anim = Scheduler(xr)
+    sensing.rate = anim.rate
 
     #import GLB assets
-    HEART_ASSET =           GLBAsset(raw = Path("assets/heart.glb").read_bytes())
-    WRENCH_ASSET =          GLBAsset(raw = Path("assets/wrench.glb").read_bytes())
-    ALLEN_WRENCH_ASSET =    GLBAsset(raw = Path("assets/allen_wrench_2.glb").read_bytes())
-    RATCHET_WRENCH_ASSET =  GLBAsset(raw = Path("assets/ratchet_wrench.glb").read_bytes())
-    BIKE_SEAT =             GLBAsset(raw = Path("assets/bike_seat.glb").read_bytes())
-    ARROW_ASSET =           GLBAsset(raw = Path("assets/arrow.glb").read_bytes())
-
-    HAND_OPEN_ASSET =       GLBAsset(raw = Path("assets/hand_open.glb").read_bytes())
-    HAND_PINCHED_ASSET =    GLBAsset(raw = Path("assets/hand_pinched.glb").read_bytes())
-
-    FRAME_ASSET_1 = ImageAsset.from_obj(obj = Image.open("assets/video_frame1.png"))
-    FRAME_ASSET_2 = ImageAsset.from_obj(obj = Image.open("assets/video_frame2.png"))
-    
-    WRENCH_GUIDE_ASSET = ImageAsset.from_obj(obj = Image.open("assets/wrench_guide.jpg"))
-    ALLEN_WRENCH_GUIDE_ASSET = ImageAsset.from_obj(obj = Image.open("assets/allen_wrench_guide.png"))
-    RATCHET_WRENCH_GUIDE_ASSET = ImageAsset.from_obj(obj = Image.open("assets/ratchet_wrench_guide.jpg"))
+    HEART_ASSET =           assets['heart'].get()
+    WRENCH_ASSET =          assets['wrench'].get()
+    ALLEN_WRENCH_ASSET =    assets['allen_wrench'].get()
+    RATCHET_WRENCH_ASSET =  assets['ratchet_wrench'].get()
+    BIKE_SEAT =             assets['bike_seat'].get()
+    ARROW_ASSET =           assets['arrow'].get()
+
+    HAND_OPEN_ASSET =       assets['hand_open'].get()
+    HAND_PINCHED_ASSET =    assets['hand_pinched'].get()
+
+    WRENCH_GUIDE_ASSET = assets['wrench_guide'].get()
+    ALLEN_WRENCH_GUIDE_ASSET = assets['allen_wrench_guide'].get()
+    RATCHET_WRENCH_GUIDE_ASSET = assets['ratchet_wrench_guide'].get()
+    BIKE_SEAT_DIAGRAM_ASSET = assets['bike_seat_diagram'].get()
     
     pinch_element = Element(
         key = 'hand_pinch',
@@ -236,14 +263,15 @@ def main(xr: SyncXR, params: dict):
     wheel_tutorial = Element(
         key = 'wheel_tutorial',
         transform = Transform(
-            position = GONE,
+            position = Vector3.zero(),
             scale = Vector3.one()
         ),
-        asset = TextAsset.from_obj("To collapse menu, place your right hand flat above the wrench and lower it down to the table!")
+        asset = text_asset("To collapse menu, place your right hand flat above the wrench and lower it down to the table!")
     )
-    xr.update(wheel_tutorial)
+    visibility.hide(wheel_tutorial)
+    wheel_tutorial.asset = None
 
-    pinch_guide = TwoFrameElement(xr, 50, Element(
+    pinch_guide = TwoFrameElement(visibility, anim, 50 / FRAME_RATE, Element(
         key = 'hand_open',
         transform = Transform(
             position = initial_rh_pos + Vector3.from_xyz(.05,.1,-.05),
@@ -276,7 +304,7 @@ def main(xr: SyncXR, params: dict):
     )]
 
     for e in wheel:
-        xr.update(e)
+        visibility.hide(e)
         e.asset = None
   
     wrench_element = Element(
@@ -294,15 +322,17 @@ def main(xr: SyncXR, params: dict):
         key = 'panel',
         transform = Transform(
             position = Vector3.from_xyz(initial_rh_pos.x-.6, initial_rh_pos.y + 0.2, initial_rh_pos.z + 0.35), # +y is up, -y is down, +z is away from user (forward)
-            scale = Vector3.one() * 0.6,
+            scale = Vector3.one() * assets['bike_seat_diagram'].scale,
             rotation = Quaternion.from_euler_angles(0, -27.5, 0)
         ),
-        asset = ImageAsset.from_obj(obj = Image.open('assets/bike-seat-diagram.jpg')),
+        asset = BIKE_SEAT_DIAGRAM_ASSET,
         color = WHITE
     )
     xr.update(panel_screen)
     panel_screen.asset = None
     
+    xr.telemetry.place_overlay(panel_screen.transform.position + Vector3.from_xyz(0, 0.45, 0))
+
     active_screen: Element = panel_screen
     active_screen_loc: Vector3 = panel_screen.transform.position
 
@@ -310,44 +340,39 @@ def main(xr: SyncXR, params: dict):
         key = 'wrench_screen',
         transform = Transform(
             position = Vector3.zero(), 
-            scale = Vector3.one() * 2,
+            scale = Vector3.one() * assets['wrench_guide'].scale,
         ),
         asset = WRENCH_GUIDE_ASSET,
-        color = INVISIBLE
+        color = WHITE
     )
-    xr.update(wrench_screen)
+    visibility.hide(wrench_screen)
     wrench_screen.asset = None
 
     ratchet_wrench_screen = Element(
         key = 'ratchet_wrench_screen',
         transform = Transform(
             position = Vector3.zero(), 
-            scale = Vector3.one() * 2.5,
+            scale = Vector3.one() * assets['ratchet_wrench_guide'].scale,
         ),
         asset = RATCHET_WRENCH_GUIDE_ASSET,
-        color = INVISIBLE
+        color = WHITE
     )
-    xr.update(ratchet_wrench_screen)
+    visibility.hide(ratchet_wrench_screen)
     ratchet_wrench_screen.asset = None
 
-    ratchet_wrench_screen.transform.scale = Vector3.one() * 2.5
-    xr.update(ratchet_wrench_screen)
     
     allen_wrench_screen = Element(
         key = 'allen_wrench_screen',
         transform = Transform(
             position = Vector3.zero(), 
-            scale = Vector3.one() * 0.4,
+            scale = Vector3.one() * assets['allen_wrench_guide'].scale,
         ),
         asset = ALLEN_WRENCH_GUIDE_ASSET,
-        color = INVISIBLE
+        color = WHITE
     )
-    xr.update(allen_wrench_screen)
+    visibility.hide(allen_wrench_screen)
     allen_wrench_screen.asset = None
 
-    allen_wrench_screen.transform.scale = Vector3.one() * .4
-    xr.update(allen_wrench_screen)
-
     idea = Element(
         key = 'idea',
         transform = Transform(
@@ -356,22 +381,21 @@ def main(xr: SyncXR, params: dict):
             rotation = Quaternion.from_euler_angles(0, 60, 0)
         ),
         asset = BIKE_SEAT,
-        color = INVISIBLE
+        color = WHITE
     )
-    xr.update(idea)
+    visibility.hide(idea)
     idea.asset = None
 
     idea.transform.scale = Vector3.one() * 0.15
-    xr.update(idea)
 
     drag_tool_tutorial = LinearAnimElement(
-        xr, pinch_element, 40, 
+        visibility, anim, pinch_element, 40 / FRAME_RATE, 
         wrench_element.transform.position + Vector3.from_xyz(-0.05, .3, 0),
         panel_screen.transform.position
     )
 
     pull_tool_tutorial = LinearAnimElement(
-        xr, pinch_element, 40, 
+        visibility, anim, pinch_element, 40 / FRAME_RATE, 
         panel_screen.transform.position,
         (initial_lh_pos + initial_rh_pos) * 0.5
     )
@@ -379,24 +403,17 @@ def main(xr: SyncXR, params: dict):
     idea_shown: bool = False
     idea_held: int = 0
 
-    stream = xr.sense(hands=True)
+    stream = xr.sense(**INTERACTION_CHANNELS)
     
-    #define panels for video frames
-    video = TwoFrameElement(xr, 10, Element(
-        key = 'frame1',
-        transform = Transform(
+    # Frames decode in the background and upload while hidden, ahead of playback.
+    # XR_VIDEO=<directory or animated image> plays a different clip.
+    video = VideoPlayer(visibility, anim, 'video',
+        os.environ.get("XR_VIDEO") or ["assets/video_frame1.png", "assets/video_frame2.png"],
+        FRAME_RATE / 10,
+        Transform(
             position = Vector3.from_xyz(initial_rh_pos.x - 0.15, initial_rh_pos.y+0.15, initial_rh_pos.z + 0.5), 
             scale = Vector3.one() * 0.35,
-        ),
-        asset = FRAME_ASSET_1,
-    ), Element(
-        key = 'frame2',
-        transform = Transform(
-            position = Vector3.from_xyz(initial_rh_pos.x - 0.15, initial_rh_pos.y+0.15, initial_rh_pos.z + 0.5), 
-            scale = Vector3.one() * 0.35,
-        ),
-        asset = FRAME_ASSET_2,
-    ))
+        ))
 
     close_element = Element(
         key = 'close',
@@ -405,18 +422,27 @@ def main(xr: SyncXR, params: dict):
             scale = Vector3.one() * 0.05
         ),
         asset = DefaultAssets.SPHERE,
-        color = INVISIBLE
+        color = RED
     )
+    visibility.hide(close_element)
+    close_element.asset = None
 
     idea_dragged_to_table: bool = False
 
     wheel_shown: bool = False
     wheel_held: list[int] = [0, 0, 0]
-    wheel_coords = [Vector3.from_xyz(0,0,0), Vector3.from_xyz(0,0,0), Vector3.from_xyz(0,0,0)]
+    logged_held: int = -1
+    wheel_coords = np.zeros((len(wheel), 3))
     
     can_cancel: bool = False
 
-    pinched_last_frame: bool = False
+    gestures = GestureTracker()
+    gestures.on(PINCH_START, lambda side, g: log.event(PINCH_START, side == 'right'))
+
+    # Smooths tracking jitter; XR_PREDICT_MS=<display latency> also extrapolates
+    # hands ahead by that plus the measured loop latency.
+    hand_filter = HandFilter()
+    predict_ms = os.environ.get("XR_PREDICT_MS")
     new_pinch: bool = False
 
     wheel_drag_tutorialed: bool = False
@@ -424,27 +450,50 @@ def main(xr: SyncXR, params: dict):
 
     pull_idea_tutorialed: bool = False
 
+    # Grab targets for pinch hit-testing, kept current as the batcher sends moves.
+    hits = HitIndex()
+    xr.observers.append(hits)
+    hits.add(panel_screen, .2)
+    hits.add(wrench_element, .1)
+    hits.add(idea, .1)
+    for e in wheel:
+        hits.add(e, .1)
+    wheel_keys = {e.key: i for i, e in enumerate(wheel)}
+
+    # Drop targets are tested along the hand's path since the previous frame, so
+    # drops and the close gesture work the same at any frame rate.
+    drops = DropTargets()
+    # The calibrated table plane, raised slightly so a drop registers just above it.
+    drops.plane('table', initial_rh_pos + Vector3.from_xyz(0, .04, 0), Vector3(table.normal))
+    # The screen is a 0.2 m sphere around the panel, as the distance check it replaced was.
+    drops.sphere('screen', panel_screen.transform.position, .2)
+    drops.disc('close', wrench_element.transform.position + Vector3.from_xyz(0, .02, 0), Vector3.up(), .1, joint = PALM)
+
     xr.update(wrench_element)
-    wheel_tutorial_timer: int = 0
+    # Reveals the wheel tutorial once the wheel has been open a while.
+    def show_wheel_tutorial():
+        visibility.show(wheel_tutorial, wrench_element.transform.position + Vector3.from_xyz(0, 0.1, 0))
+    wheel_tutorial_timer: int | None = None
+    pinch_guide.play()
     for frame in stream:
-        pinch_guide.inc()
-
-        if pull_tool_tutorial.shown:
-            pull_tool_tutorial.tick()
+        with TELEMETRY.span("anim.tick"):
+            anim.tick(frame.get('time'))
+            video.preload()
             
-        if not pinched_last_frame and frame['hands'].right and pinch(frame['hands'].right):
-            new_pinch = True
-            pinched_last_frame = True
-        else:
-            new_pinch = False
-            if frame['hands'].right and not pinch(frame['hands'].right):
-                pinched_last_frame = False
+        log.frame(frame)
+        with TELEMETRY.span("gestures"):
+            if predict_ms is not None:
+                hand_filter.horizon = float(predict_ms) / 1000 + xr.latency
+            filter_hands(frame, hand_filter)
+            gestures.update(frame)
+            new_pinch = gestures.right.pinch_start
+            drops.update(frame)
 
         # Handle spawning of idea.
-        if not idea_shown and new_pinch and ui_button(panel_screen, frame, .2):
+        if not idea_shown and new_pinch and ui_button(panel_screen, frame, .2, hits):
             idea_shown = True
-            idea.transform.position = frame['hands'].right[INDEX_TIP].position
-            idea.color = WHITE
+            visibility.show(idea, Vector3(hand_features(frame).right.index_tip.copy()))
+            log.event('idea_shown')
 
             if not pull_idea_tutorialed:
                 pull_idea_tutorialed = True
@@ -452,50 +501,43 @@ def main(xr: SyncXR, params: dict):
         
         # Handle dragging of "idea."
         if idea_shown:
-            idea_held = ui_drag(idea, frame, .1, idea_held)
-            if idea.transform.position.y <= initial_rh_pos.y + .04:
+            idea_held = ui_drag(idea, frame, .1, idea_held, hits)
+            # The idea drops as soon as it is held down onto the table.
+            if idea_held > 0 and drops.drop('table'):
                 idea_shown = False
-                idea.color = INVISIBLE
-                idea.transform.position = GONE
+                visibility.hide(idea)
                 
-                wheel_tutorial_timer = 0
+                if wheel_tutorial_timer is not None:
+                    # Start the wheel tutorial's wait over.
+                    anim.cancel(wheel_tutorial_timer)
+                    wheel_tutorial_timer = anim.after(WHEEL_TUTORIAL_DELAY, show_wheel_tutorial)
                 idea_dragged_to_table = True
-            xr.update(idea)
+                log.event('idea_dragged_to_table')
 
-        # Draw "video."
-        if idea_dragged_to_table:
-            video.inc()
+                # Draw "video."
+                video.play()
+            xr.update(idea)
             
-        if not wheel_shown and new_pinch and ui_button(wrench_element, frame, 0.1):
-            show_wheel(wheel, 
+        if not wheel_shown and new_pinch and ui_button(wrench_element, frame, 0.1, hits):
+            show_wheel(xr, visibility, wheel, 
                        wrench_element.transform.position 
                             + Vector3.from_xyz(0, 0.15, 0))
+            wheel_coords = xr.read(wheel)
+            log.event('wheel_open')
+
+            wheel_shown = True
+            if not wheel_close_tutorial_is_dismissed and wheel_tutorial_timer is None:
+                wheel_tutorial_timer = anim.after(WHEEL_TUTORIAL_DELAY, show_wheel_tutorial)
+            # The guide shares its pinch element with the drag tutorial, so it
+            # must be hidden before the tutorial shows it again.
+            pinch_guide.destroy()
             
             if not wheel_drag_tutorialed:
                 drag_tool_tutorial.element.transform.rotation \
                     = Quaternion.from_euler_angles(90, -45, 20)
                 drag_tool_tutorial.show()
-
-            for i, e in enumerate(wheel):
-                wheel_coords[i] = e.transform.position
-                xr.update(e)
-
-            wheel_shown = True
-            pinch_guide.destroy()
             
         if wheel_shown and frame['hands'].right:
-            # display the wheel tutorial if the user has not interacted with the wheel for a while
-            if not wheel_close_tutorial_is_dismissed and wheel_tutorial_timer > 200:
-                wheel_tutorial.transform.position \
-                    = wrench_element.transform.position \
-                        + Vector3.from_xyz(0, 0.1, 0)
-                xr.update(wheel_tutorial)
-
-            if not wheel_drag_tutorialed:
-                drag_tool_tutorial.tick()
-
-            hands: Hands = frame['hands']
-            
             i: int = -1
             for idx, wh in enumerate(wheel_held):
                 if wh > 0:
@@ -503,130 +545,128 @@ def main(xr: SyncXR, params: dict):
                     break
 
             if i >= 0:
-                wheel_held[i] = ui_drag(e, frame, 0.1, wheel_held[i])
+                wheel_held[i] = ui_drag(wheel[i], frame, 0.1, wheel_held[i], hits)
+                # A wheel tool drops where it is let go.
                 if wheel_held[i] == 0:
-                    if distance(wheel[i].transform.position, active_screen.transform.position) < .2:
+                    if drops.drop('screen'):
                         screens = [wrench_screen, allen_wrench_screen, ratchet_wrench_screen]
                         active_screen_loc = active_screen.transform.position
                         # next render the new panel and remove the old
-                        active_screen.color = INVISIBLE
-                        active_screen.transform.position = Vector3.zero()
-                        xr.update(active_screen)
+                        visibility.hide(active_screen)
 
-                        screens[i].color = WHITE
-                        screens[i].transform.position = active_screen_loc
                         screens[i].transform.rotation = active_screen.transform.rotation
-                        xr.update(screens[i])
+                        visibility.show(screens[i], active_screen_loc)
 
                         active_screen = screens[i]
+                        log.event('screen_swap', i)
 
                         if not wheel_drag_tutorialed:
                             wheel_drag_tutorialed = True
                             drag_tool_tutorial.hide()
                         
-                    wheel[i].transform.position = wheel_coords[i]
-                xr.update(e)
+                    wheel[i].transform.position = Vector3(wheel_coords[i].copy())
+                xr.update(wheel[i])
             else:
-                for i, e in enumerate(wheel):
-                    wheel_held[i] = ui_drag(e, frame, 0.1, wheel_held[i])
+                key = hits.nearest(frame, wheel_keys)
+                if key is not None:
+                    i = wheel_keys[key]
+                    wheel_held[i] = ui_drag(wheel[i], frame, 0.1, wheel_held[i], hits)
                     if wheel_held[i] > 0:
-                        xr.update(e)
-                        break
+                        xr.update(wheel[i])
+
+            held = next((k for k, h in enumerate(wheel_held) if h > 0), -1)
+            if held != logged_held:
+                logged_held = held
+                log.event('wheel_held', held)
                 
             # Handle wheel close.
-            v: Vector3 = hands.right[PALM].position - wrench_element.transform.position
-            if not (sq_horz_mag(v) < .01 and open_hand(hands.right)):
+            palm = Vector3(hand_features(frame).right.palm.copy())
+            v: Vector3 = palm - wrench_element.transform.position
+            # If closing is enabled, close once the open palm has come down to the
+            # pad above the wrench, even if it passed it between two frames.
+            if can_cancel and gestures.right.open and drops.hit('close'):
                 can_cancel = False
-                close_element.transform.position = Vector3.zero()
-                close_element.color = INVISIBLE
-                xr.update(close_element)
+                visibility.hide(close_element)
+                
+                hide_wheel(visibility, wheel)
+
+                wheel_shown = False
+
+                # Revert active screen to default.
+                visibility.hide(active_screen)
+                visibility.show(panel_screen, active_screen_loc)
+
+                active_screen = panel_screen
+                log.event('wheel_close')
+
+                if not wheel_drag_tutorialed:
+                    wheel_drag_tutorialed = True
+                    drag_tool_tutorial.hide()
+
+                wheel_close_tutorial_is_dismissed = True
+                anim.cancel(wheel_tutorial_timer)
+                visibility.hide(wheel_tutorial)
+
+                if not pull_idea_tutorialed:
+                    pull_tool_tutorial.show()
+            elif not (sq_horz_mag(v) < .01 and gestures.right.open):
+                can_cancel = False
+                visibility.hide(close_element)
             else:
                 # Enable closing when hand is high enough.
                 if v.y > 0.3:
                     close_element.color = RED                
                     can_cancel = True
 
-                # If closing is enabled, close when hand reaches low enough y-threshold.
                 if can_cancel:
-                    close_element.transform.position = hands.right[PALM].position + Vector3.from_xyz(0, -0.02, 0)
                     close_element.color = (1, (.3 - v.y) / .3, (.3 - v.y) / .3, 1)
+                    visibility.show(close_element, palm + Vector3.from_xyz(0, -0.02, 0))
 
-                    if v.y <= .02:
-                        can_cancel = False
-                        close_element.transform.position = Vector3.zero()
-                        close_element.color = INVISIBLE
-                        
-                        hide_wheel(wheel)
-                    
-                        for e in wheel:
-                            xr.update(e)
-
-                        wheel_shown = False
-
-                        # Revert active screen to default.
-                        active_screen.color = INVISIBLE
-                        active_screen.transform.position = Vector3.zero()
-                        xr.update(active_screen)
-
-                        panel_screen.color = WHITE
-                        panel_screen.transform.position = active_screen_loc
-                        xr.update(panel_screen)
-
-                        active_screen = panel_screen
-
-                        if not wheel_drag_tutorialed:
-                            wheel_drag_tutorialed = True
-                            drag_tool_tutorial.hide()
-
-                        wheel_close_tutorial_is_dismissed = True
-                        wheel_tutorial.transform.position = GONE
-                        xr.update(wheel_tutorial)
-
-                        if not pull_idea_tutorialed:
-                            pull_tool_tutorial.show()
-
-                    xr.update(close_element)
-
-        #update timer only once wheel is open
-        if wheel_shown:            
-            wheel_tutorial_timer += 1
-
+    video.destroy()
     stream.close()
 
+# Whether the right index fingertip is within radius of an element. Elements
+# registered in the hit index use its per-element radius instead. Hidden
+# elements are never touched.
+def ui_touching(ui: Element, frame: dict, radius: float, hits: HitIndex | None = None) -> bool:
+    if not getattr(ui, 'active', True):
+        return False
+    if hits is not None and ui.key in hits.elements:
+        return hits.touching(frame, ui)
+    return hand_features(frame).right.reach(ui.transform.position) < radius
+
 # Return true if an element is pinched by the right hand.
-def ui_button(button: Element, frame: dict, radius: float) -> bool:
-    hands: Hands = frame['hands']
-    if (not hands.right):
+def ui_button(button: Element, frame: dict, radius: float, hits: HitIndex | None = None) -> bool:
+    right = hand_features(frame).right
+    if (not right):
         # button.color = WHITE
         return False
 
-    handpos = hands.right[INDEX_TIP].position
-    if distance(handpos, button.transform.position) < radius:
+    if ui_touching(button, frame, radius, hits):
         # button.color = RED
-        return pinch(hands.right)
+        return right_pinching(frame)
     
     # button.color = WHITE
     return False
 
 # Return number greater than 0 if element is held down.
 # Pass held state to prevent pinch from decoupling from element mid-movement
-def ui_held(ui: Element, frame: dict, radius: float, extra_frames: int):
+def ui_held(ui: Element, frame: dict, radius: float, extra_frames: int, hits: HitIndex | None = None):
     FRAMES = 2
     
-    hands: Hands = frame['hands']
-    if (not hands.right):
+    right = hand_features(frame).right
+    if (not right):
         # if (extra_frames == 0):
             # ui.color = WHITE
         return max(0, extra_frames - 1)
 
-    handpos = hands.right[INDEX_TIP].position
-    if distance(handpos, ui.transform.position) < radius:
+    if ui_touching(ui, frame, radius, hits):
         # ui.color = RED
-        if pinch(hands.right):
+        if right_pinching(frame):
             return FRAMES
         
     if extra_frames > 0:
-        if pinch(hands.right):
+        if right_pinching(frame):
             return FRAMES
         else:
             return extra_frames - 1
@@ -634,13 +674,22 @@ def ui_held(ui: Element, frame: dict, radius: float, extra_frames: int):
     # ui.color = WHITE
     return 0
 
-def ui_drag(ui: Element, frame: dict, radius: float, extra_frames: int):
-    ret: int = ui_held(ui, frame, radius, extra_frames)
+def ui_drag(ui: Element, frame: dict, radius: float, extra_frames: int, hits: HitIndex | None = None):
+    ret: int = ui_held(ui, frame, radius, extra_frames, hits)
     if ret > 0 and frame['hands'].right:
-        ui.transform.position = frame['hands'].right[INDEX_TIP].position
+        ui.transform.position = Vector3(hand_features(frame).right.index_tip.copy())
     return ret
 
 
 if __name__ == "__main__":
+    # The server stack is only needed here, not by tools that import main.
+    from xarp.server import run, show_qrcode_link
+
+    # Decode and optimize every asset while the server starts and the QR code is
+    # being scanned, so the first headset does not wait for them.
+    load_assets(shared_assets())
     show_qrcode_link()
-    run(main)
+    max_sessions = os.environ.get(ENV_MAX_SESSIONS)
+    run(SessionManager(main,
+                       max_sessions = int(max_sessions) if max_sessions else None,
+                       metrics_path = os.environ.get(ENV_METRICS)))
@@ -0,0 +1,133 @@
+import copy
+import queue
+import threading
+
+from xarp.express import SyncXR
+from xarp.entities import Element
+
+from telemetry import TELEMETRY
+
+
+# Snapshot of an element safe to hand to another thread: the frame loop keeps
+# mutating the original's transform in place. Assets are shared, never mutated.
+def _snapshot(element: Element) -> Element:
+    snap = copy.copy(element)
+    snap.transform = copy.deepcopy(element.transform)
+    return snap
+
+
+# Decouples the interaction logic from the XR connection. A receiver thread per
+# sense stream keeps only the newest frame, so a slow iteration skips the frames
+# that arrived meanwhile instead of falling behind the user's hands. Updates are
+# queued and sent in order by a sender thread, so serialization and socket
+# writes no longer block the loop. SyncXR is blocking and the logic is
+# synchronous, so both sides run on threads rather than an asyncio loop. An
+# error on either thread is raised in the frame loop at its next call.
+class PipelinedXR:
+    def __init__(self, xr: SyncXR):
+        self.xr = xr
+        self.received = 0
+        self.dropped = 0
+        self.error: BaseException | None = None
+        self.outbox = queue.Queue()
+        self.sender = threading.Thread(target=self._send_loop, name="xr-sender", daemon=True)
+        self.sender.start()
+
+    def sense(self, **kwargs):
+        self.check()
+        return LatestFrameStream(self, self.xr.sense(**kwargs))
+
+    def update(self, element: Element):
+        self.check()
+        self.outbox.put((self.xr.update, _snapshot(element)))
+
+    def destroy_element(self, element: Element):
+        self.check()
+        self.outbox.put((self.xr.destroy_element, element))
+
+    # Raise the first error a pipeline thread ran into.
+    def check(self):
+        if self.error is not None:
+            raise self.error
+
+    # Wait until every queued update has been sent.
+    def drain(self):
+        self.outbox.join()
+        self.check()
+
+    # Send what is queued and stop the sender thread.
+    def close(self, timeout: float = 1.0):
+        self.outbox.put(None)
+        self.sender.join(timeout)
+
+    def _send_loop(self):
+        while True:
+            item = self.outbox.get()
+            if item is None:
+                self.outbox.task_done()
+                return
+            send, element = item
+            try:
+                # After an error the rest of the queue is discarded, so drain() returns.
+                if self.error is None:
+                    send(element)
+            except BaseException as e:
+                self.error = e
+            finally:
+                self.outbox.task_done()
+
+    def __getattr__(self, name):
+        return getattr(self.xr, name)
+
+
+class LatestFrameStream:
+    def __init__(self, owner: PipelinedXR, stream):
+        self.owner = owner
+        self.stream = stream
+        self.cond = threading.Condition()
+        self.latest = None
+        self.done = False
+        self.closed = False
+        self.receiver = threading.Thread(target=self._receive, name="xr-receiver", daemon=True)
+        self.receiver.start()
+
+    def _receive(self):
+        try:
+            for frame in self.stream:
+                if self.closed:
+                    break
+                with self.cond:
+                    if self.latest is not None:
+                        self.owner.dropped += 1
+                        TELEMETRY.count("frames_dropped")
+                    self.owner.received += 1
+                    self.latest = frame
+                    self.cond.notify()
+        except BaseException as e:
+            self.owner.error = self.owner.error or e
+        finally:
+            # The underlying stream is closed from the thread iterating it.
+            self.stream.close()
+            with self.cond:
+                self.done = True
+                self.cond.notify()
+
+    def __iter__(self):
+        while True:
+            self.owner.check()
+            with self.cond:
+                while self.latest is None and not self.done:
+                    self.cond.wait()
+                if self.latest is None:
+                    self.owner.check()
+                    return
+                frame, self.latest = self.latest, None
+            yield frame
+
+    # Send what is queued, then wait for the receiver to stop so two sense
+    # streams never overlap. The receiver only notices once the next frame
+    # arrives, so a stalled headset stream is given up on after timeout seconds.
+    def close(self, timeout: float = 1.0):
+        self.closed = True
+        self.owner.drain()
+        self.receiver.join(timeout)
@@ -0,0 +1,166 @@
+import struct
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from xarp.data_models import Hands
+from xarp.spatial import Pose, Quaternion, Vector3
+
+# Session file layout (little endian):
+#   header: b"XRSN" + u16 version
+#   frame:  f64 seconds since recording started, u8 flags (1 left, 2 right, 4 eye)
+#           per present hand: u8 joint count, then joints x 7 float32 (position xyz, rotation xyzw)
+#           eye if present: 7 float32
+MAGIC = b"XRSN"
+VERSION = 1
+LEFT, RIGHT, EYE = 1, 2, 4
+
+_HEADER = struct.Struct("<4sH")
+_FRAME = struct.Struct("<dB")
+
+
+def _pose_row(pose) -> np.ndarray:
+    return np.concatenate((pose.position.to_numpy(), pose.rotation.to_numpy()))
+
+def _pose(row: np.ndarray) -> Pose:
+    return Pose(position = Vector3(row[:3].astype(np.float64)), rotation = Quaternion(row[3:].astype(np.float64)))
+
+
+# Writes every frame of the sense streams it wraps to a session file.
+class RecordingXR:
+    def __init__(self, xr, path: str | Path):
+        self.xr = xr
+        self.file = open(path, 'wb')
+        self.file.write(_HEADER.pack(MAGIC, VERSION))
+        self.start = time.monotonic()
+
+    def sense(self, **kwargs):
+        return RecordingStream(self, self.xr.sense(**kwargs))
+
+    def write(self, frame: dict):
+        hands = frame.get('hands')
+        eye = frame.get('eye')
+        flags = 0
+        blocks = []
+        for flag, hand in ((LEFT, hands and hands.left), (RIGHT, hands and hands.right)):
+            if hand:
+                flags |= flag
+                joints = np.stack([_pose_row(p) for p in hand]).astype('<f4')
+                blocks.append(struct.pack("<B", len(hand)) + joints.tobytes())
+        if eye is not None:
+            flags |= EYE
+            blocks.append(_pose_row(eye).astype('<f4').tobytes())
+
+        self.file.write(_FRAME.pack(time.monotonic() - self.start, flags))
+        self.file.write(b"".join(blocks))
+
+    def close(self):
+        self.file.close()
+
+    def __getattr__(self, name):
+        return getattr(self.xr, name)
+
+class RecordingStream:
+    def __init__(self, recorder: RecordingXR, stream):
+        self.recorder = recorder
+        self.stream = stream
+
+    def __iter__(self):
+        for frame in self.stream:
+            self.recorder.write(frame)
+            yield frame
+
+    def close(self):
+        self.recorder.file.flush()
+        self.stream.close()
+
+
+def read_frames(path: str | Path):
+    with open(path, 'rb') as f:
+        magic, version = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} session recording")
+
+        while header := f.read(_FRAME.size):
+            t, flags = _FRAME.unpack(header)
+            hands = {}
+            for flag, side in ((LEFT, 'left'), (RIGHT, 'right')):
+                if flags & flag:
+                    (count,) = struct.unpack("<B", f.read(1))
+                    rows = np.frombuffer(f.read(count * 7 * 4), dtype='<f4').reshape(count, 7)
+                    hands[side] = tuple(_pose(row) for row in rows)
+            frame = {'hands': Hands(left = hands.get('left'), right = hands.get('right'))}
+            if flags & EYE:
+                frame['eye'] = _pose(np.frombuffer(f.read(7 * 4), dtype='<f4'))
+            yield t, frame
+
+
+# Stand-in for SyncXR that replays a session file and records every call the
+# app makes. Successive sense() streams continue from where the last one
+# stopped, like a live headset. With realtime=False frames are served as fast
+# as the app consumes them.
+class ReplayXR:
+    def __init__(self, path: str | Path, realtime: bool = True):
+        self.frames = read_frames(path)
+        self.realtime = realtime
+        self.frame = -1
+        self.calls: list[tuple[int, str, str]] = []
+        self._t0 = None
+
+    def sense(self, **kwargs):
+        return ReplayStream(self, kwargs)
+
+    def update(self, element):
+        self.calls.append((self.frame, 'update', element.key))
+
+    def destroy_element(self, element):
+        self.calls.append((self.frame, 'destroy_element', element.key))
+
+    def next_frame(self, channels: dict) -> dict | None:
+        item = next(self.frames, None)
+        if item is None:
+            return None
+        t, frame = item
+
+        if self.realtime:
+            now = time.monotonic()
+            if self._t0 is None:
+                self._t0 = now - t
+            delay = self._t0 + t - now
+            if delay > 0:
+                time.sleep(delay)
+
+        self.frame += 1
+        frame = {name: value for name, value in frame.items() if channels.get(name)}
+        frame['time'] = t
+        return frame
+
+class ReplayStream:
+    def __init__(self, xr: ReplayXR, channels: dict):
+        self.xr = xr
+        self.channels = channels
+        self.closed = False
+
+    def __iter__(self):
+        while not self.closed:
+            frame = self.xr.next_frame(self.channels)
+            if frame is None:
+                return
+            yield frame
+
+    def close(self):
+        self.closed = True
+
+
+# Replay a recorded session through main(): python replay.py session.xrs [--fast]
+if __name__ == "__main__":
+    from main import main
+
+    xr = ReplayXR(sys.argv[1], realtime = "--fast" not in sys.argv)
+    start = time.perf_counter()
+    main(xr, {})
+    elapsed = time.perf_counter() - start
+
+    updates = sum(1 for _, kind, _ in xr.calls if kind == 'update')
+    print(f"frames: {xr.frame + 1}  updates: {updates}  elapsed: {elapsed:.2f}s")
@@ -0,0 +1,95 @@
+import time
+
+from xarp.express import SyncXR
+from xarp.entities import Element
+from delta import DeltaEncoder, POSITION_EPSILON
+from telemetry import TELEMETRY
+
+
+# Collects the xr.update calls made while a frame is processed and sends every
+# changed element once when the frame ends, instead of once per call site.
+# Elements whose state matches what was last sent are skipped entirely, and an
+# asset the client already has is not attached again.
+class SceneBatcher:
+    def __init__(self, xr: SyncXR, epsilon: float = POSITION_EPSILON):
+        self.xr = xr
+        self.encoder = DeltaEncoder(epsilon)
+        self.dirty: dict[str, Element] = {}
+        # Call sites clear element.asset right after xr.update, so keep the asset
+        # around until the element is actually sent.
+        self.pending_assets: dict[str, object] = {}
+        # Smoothed seconds from a frame arriving to its updates being sent.
+        self.latency = 0.0
+        # Notified with moved(element) whenever a new position is sent.
+        self.observers: list = []
+        # This session's frame timing and telemetry overlay.
+        self.telemetry = TELEMETRY.session()
+
+    def update(self, element: Element):
+        self.dirty[element.key] = element
+        if element.asset is not None:
+            self.pending_assets[element.key] = element.asset
+
+    def destroy_element(self, element: Element):
+        self.dirty.pop(element.key, None)
+        self.pending_assets.pop(element.key, None)
+        self.encoder.forget(element.key)
+        self.xr.destroy_element(element)
+
+    def sense(self, **kwargs):
+        return BatchedStream(self, self.xr.sense(**kwargs))
+
+    def flush(self):
+        for key, element in self.dirty.items():
+            asset = self.pending_assets.pop(key, None)
+            if asset is not None and element.asset is None:
+                element.asset = asset
+                self._send(key, element)
+                element.asset = None
+            else:
+                self._send(key, element)
+        self.dirty.clear()
+
+    def _send(self, key: str, element: Element):
+        changed = self.encoder.diff(element)
+        if not changed:
+            return
+        self.encoder.commit(key, changed)
+
+        asset = element.asset
+        with TELEMETRY.span("xr.update"):
+            if asset is not None and 'asset' not in changed:
+                element.asset = None
+                self.xr.update(element)
+                element.asset = asset
+            else:
+                self.xr.update(element)
+        TELEMETRY.update_sent(key)
+
+        if 'position' in changed:
+            for observer in self.observers:
+                observer.moved(element)
+
+    def __getattr__(self, name):
+        return getattr(self.xr, name)
+
+
+# Wraps a sense stream so pending updates go out once per sensed frame.
+class BatchedStream:
+    def __init__(self, batcher: SceneBatcher, stream):
+        self.batcher = batcher
+        self.stream = stream
+
+    def __iter__(self):
+        self.batcher.flush()
+        for frame in self.stream:
+            self.batcher.telemetry.frame_start()
+            start = time.perf_counter()
+            yield frame
+            self.batcher.flush()
+            self.batcher.latency += 0.1 * (time.perf_counter() - start - self.batcher.latency)
+            self.batcher.telemetry.frame_end(self.batcher)
+
+    def close(self):
+        self.batcher.flush()
+        self.stream.close()
@@ -0,0 +1,63 @@
+import os
+import time
+
+from telemetry import TELEMETRY
+
+# XR_IDLE_HZ=<n> caps how many frames per second reach the app while it is idle
+# (default 10); XR_IDLE_HZ=0 processes every frame.
+IDLE_RATE = float(os.environ.get("XR_IDLE_HZ", 10))
+
+# Seconds without a hand before the app counts as idle, so brief tracking
+# dropouts keep the full rate.
+IDLE_AFTER = 0.5
+
+
+# Lowers the rate at which sensed frames reach the app while it is idle: no hand
+# has been tracked for idle_after seconds. Idle frames beyond idle_rate per
+# second, or the rate rate() reports its animations need if that is higher, are
+# dropped before the app or any wrapper above this one sees them, so a slow
+# flipbook does not keep the full rate. A frame with a hand in it always passes
+# and ends idleness at once. Time is the sensed frame's time when it has one.
+# The app sets rate once its animations exist.
+class AdaptiveXR:
+    def __init__(self, xr, idle_rate: float = IDLE_RATE, idle_after: float = IDLE_AFTER, clock = time.monotonic):
+        self.xr = xr
+        self.idle_rate = idle_rate
+        self.idle_after = idle_after
+        self.clock = clock
+        self.rate = lambda: 0.0
+        self.skipped = 0
+
+    def sense(self, **kwargs):
+        return AdaptiveStream(self, self.xr.sense(**kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self.xr, name)
+
+class AdaptiveStream:
+    def __init__(self, owner: AdaptiveXR, stream):
+        self.owner = owner
+        self.stream = stream
+
+    def __iter__(self):
+        owner = self.owner
+        active = passed = None
+        for frame in self.stream:
+            now = frame.get('time')
+            if now is None:
+                now = owner.clock()
+            if active is None:
+                active = passed = now
+            hands = frame.get('hands')
+            if hands is not None and (hands.left or hands.right):
+                active = now
+            elif owner.idle_rate > 0 and now - active > owner.idle_after and \
+                    now - passed < 1 / max(owner.idle_rate, owner.rate()):
+                owner.skipped += 1
+                TELEMETRY.count("idle_frames")
+                continue
+            passed = now
+            yield frame
+
+    def close(self):
+        self.stream.close()
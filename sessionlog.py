@@ -0,0 +1,217 @@
+import itertools
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+from hands import hand_array
+
+# Session log layout: a directory with meta.json and one raw little-endian file
+# per column, each a sequence of fixed-width rows.
+#   frames: t f8 seconds since the log opened, hands u1 flags (1 left, 2 right),
+#           joints f4 (2, JOINTS, 3) left and right joint positions, NaN when untracked
+#   events: event_t f8, event_frame i4 frames logged before the event,
+#           event_kind u1 index into EVENTS, event_value i4
+VERSION = 1
+JOINTS = 26
+LEFT, RIGHT = 1, 2
+
+EVENTS = ('pinch_start', 'idea_shown', 'idea_dragged_to_table', 'wheel_open', 'wheel_held', 'screen_swap', 'wheel_close')
+_KINDS = {name: i for i, name in enumerate(EVENTS)}
+
+TABLES = {
+    'frames': {'t': ('<f8', ()), 'hands': ('u1', ()), 'joints': ('<f4', (2, JOINTS, 3))},
+    'events': {'event_t': ('<f8', ()), 'event_frame': ('<i4', ()), 'event_kind': ('u1', ()), 'event_value': ('<i4', ())},
+}
+
+# XR_LOG=<dir> writes a session log of every session into <dir>.
+ENV_LOG = "XR_LOG"
+
+
+# One column file, memory-mapped and grown a chunk of rows at a time. The file
+# is cut back to the rows written when it is closed.
+class Column:
+    def __init__(self, path: Path, dtype: str, shape: tuple, chunk: int = 4096):
+        self.path = path
+        self.dtype = np.dtype(dtype)
+        self.shape = shape
+        self.chunk = chunk
+        self.row_bytes = self.dtype.itemsize * int(np.prod(shape, dtype=int))
+        self.rows = 0
+        self.map: np.memmap | None = None
+        open(path, 'wb').close()
+
+    def append(self, values: np.ndarray):
+        end = self.rows + len(values)
+        if self.map is None or end > len(self.map):
+            self._resize((end // self.chunk + 1) * self.chunk)
+        self.map[self.rows:end] = values
+        self.rows = end
+
+    def _resize(self, rows: int):
+        if self.map is not None:
+            self.map.flush()
+            self.map = None
+        with open(self.path, 'r+b') as f:
+            f.truncate(rows * self.row_bytes)
+        if rows:
+            self.map = np.memmap(self.path, dtype=self.dtype, mode='r+', shape=(rows,) + self.shape)
+
+    def close(self):
+        self._resize(self.rows)
+
+
+# Rows staged by the frame loop until the writer thread copies them out.
+class Block:
+    def __init__(self, table: str, size: int):
+        self.table = table
+        self.columns = {name: np.empty((size,) + shape, dtype=dtype) for name, (dtype, shape) in TABLES[table].items()}
+        self.rows = 0
+
+
+# Logs every frame's hand joints and the session's interaction events. The
+# frame loop only copies a row into the current block; full blocks are handed
+# to a writer thread that appends them to the memory-mapped column files, and
+# drained blocks are reused.
+class SessionLog:
+    def __init__(self, path: str | Path, block: int = 64):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        with open(self.path / "meta.json", 'w') as f:
+            json.dump({
+                'version': VERSION,
+                'events': EVENTS,
+                'columns': {name: [dtype, list(shape)] for table in TABLES.values() for name, (dtype, shape) in table.items()},
+            }, f)
+
+        self.columns = {name: Column(self.path / f"{name}.bin", dtype, shape)
+                        for table in TABLES.values() for name, (dtype, shape) in table.items()}
+        self.block = block
+        self.start = time.monotonic()
+        self.frames = 0
+        self.spare = {table: queue.SimpleQueue() for table in TABLES}
+        self.current = {table: Block(table, block) for table in TABLES}
+        self.full = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="session-log", daemon=True)
+        self._thread.start()
+
+    def frame(self, frame: dict):
+        block = self.current['frames']
+        row = block.rows
+        columns = block.columns
+        # The tracked joints as sensed, never the filtered or predicted ones.
+        hands = frame['hands']
+        flags = 0
+        joints = columns['joints'][row]
+        for side, (flag, hand) in enumerate(((LEFT, hands.left), (RIGHT, hands.right))):
+            if not hand:
+                joints[side] = np.nan
+                continue
+            flags |= flag
+            raw = hand_array(hand)
+            count = min(len(raw), JOINTS)
+            joints[side, :count] = raw[:count]
+            joints[side, count:] = np.nan
+        columns['t'][row] = time.monotonic() - self.start
+        columns['hands'][row] = flags
+        self.frames += 1
+        self._advance(block)
+
+    def event(self, kind: str, value: int = 0):
+        block = self.current['events']
+        row = block.rows
+        columns = block.columns
+        columns['event_t'][row] = time.monotonic() - self.start
+        columns['event_frame'][row] = self.frames
+        columns['event_kind'][row] = _KINDS[kind]
+        columns['event_value'][row] = value
+        self._advance(block)
+
+    def _advance(self, block: Block):
+        block.rows += 1
+        if block.rows == self.block:
+            self.full.put(block)
+            try:
+                self.current[block.table] = self.spare[block.table].get_nowait()
+            except queue.Empty:
+                self.current[block.table] = Block(block.table, self.block)
+
+    # Write out what is staged and close the column files.
+    def close(self):
+        for block in self.current.values():
+            if block.rows:
+                self.full.put(block)
+        self.full.put(None)
+        self._thread.join()
+        for column in self.columns.values():
+            column.close()
+
+    def _run(self):
+        while (block := self.full.get()) is not None:
+            for name, values in block.columns.items():
+                self.columns[name].append(values[:block.rows])
+            block.rows = 0
+            self.spare[block.table].put(block)
+
+
+class NullLog:
+    def frame(self, frame: dict):
+        pass
+
+    def event(self, kind: str, value: int = 0):
+        pass
+
+    def close(self):
+        pass
+
+
+_ids = itertools.count(1)
+
+def session_log() -> SessionLog | NullLog:
+    directory = os.environ.get(ENV_LOG)
+    if not directory:
+        return NullLog()
+    return SessionLog(Path(directory) / time.strftime(f"session-%Y%m%d-%H%M%S-{os.getpid()}-{next(_ids)}.xrl"))
+
+
+# A session log as arrays, memory-mapped read-only. event_name holds the name
+# of each event's kind. Rows past the last one written (a session that did not
+# close its log) are dropped.
+def read_log(path: str | Path) -> dict[str, np.ndarray]:
+    path = Path(path)
+    meta = json.loads((path / "meta.json").read_text())
+    if meta['version'] != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} session log")
+
+    log = {}
+    for name, (dtype, shape) in meta['columns'].items():
+        file = path / f"{name}.bin"
+        rows = file.stat().st_size // (np.dtype(dtype).itemsize * int(np.prod(shape, dtype=int)))
+        log[name] = np.memmap(file, dtype=dtype, mode='r', shape=(rows,) + tuple(shape)) if rows else \
+            np.empty((0,) + tuple(shape), dtype=dtype)
+
+    for table, time_column in (('frames', 't'), ('events', 'event_t')):
+        written = np.flatnonzero(log[time_column])
+        rows = written[-1] + 1 if len(written) else 0
+        for name in TABLES[table]:
+            log[name] = log[name][:rows]
+
+    log['event_name'] = np.array(meta['events'])[log['event_kind']]
+    return log
+
+
+# Summarize a session log: python sessionlog.py <session.xrl>
+if __name__ == "__main__":
+    log = read_log(sys.argv[1])
+    t = log['t']
+    print(f"frames: {len(t)}  seconds: {t[-1] if len(t) else 0:.1f}  "
+          f"left tracked: {np.mean(log['hands'] & LEFT > 0):.0%}  right tracked: {np.mean(log['hands'] & RIGHT > 0):.0%}")
+    for name in EVENTS:
+        count = int(np.sum(log['event_name'] == name))
+        if count:
+            print(f"{name}: {count}")
@@ -0,0 +1,160 @@
+import itertools
+import json
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+# XR_SESSION_METRICS=<file> appends one JSON line per interval with every
+# session's frame times. XR_MAX_SESSIONS=<n> turns away headsets beyond n.
+ENV_METRICS = "XR_SESSION_METRICS"
+ENV_MAX_SESSIONS = "XR_MAX_SESSIONS"
+
+
+# Frame timing of one session: wall time the app spent per frame (sensed frame
+# in to updates out), over a bounded window.
+class SessionStats:
+    def __init__(self, session: int, capacity: int = 4096):
+        self.session = session
+        self.started = time.monotonic()
+        self.ended: float | None = None
+        self.frames = 0
+        self.updates = 0
+        self.wall: deque = deque(maxlen=capacity)
+        # Seconds from connecting to the end of the first frame of each sensed
+        # stream; for main, the calibration prompt and the first interactive frame.
+        self.first_frames: list[float] = []
+
+    def frame(self, wall: float):
+        self.frames += 1
+        self.wall.append(wall)
+
+    def summary(self) -> dict:
+        end = self.ended or time.monotonic()
+        summary = {
+            'session': self.session,
+            'seconds': round(end - self.started, 1),
+            'active': self.ended is None,
+            'frames': self.frames,
+            'updates': self.updates,
+        }
+        if self.first_frames:
+            summary['first_frame_s'] = [round(s, 3) for s in self.first_frames]
+        if self.wall:
+            wall = np.array(self.wall) * 1000
+            summary['frame_ms'] = {
+                'p50': round(float(np.percentile(wall, 50)), 3),
+                'p95': round(float(np.percentile(wall, 95)), 3),
+                'p99': round(float(np.percentile(wall, 99)), 3),
+            }
+        return summary
+
+
+# Wraps a session's connection to time its frames and count its updates.
+class SessionXR:
+    def __init__(self, xr, stats: SessionStats):
+        self.xr = xr
+        self.stats = stats
+
+    def sense(self, **kwargs):
+        return TimedStream(self.stats, self.xr.sense(**kwargs))
+
+    def update(self, element):
+        self.stats.updates += 1
+        self.xr.update(element)
+
+    def __getattr__(self, name):
+        return getattr(self.xr, name)
+
+class TimedStream:
+    def __init__(self, stats: SessionStats, stream):
+        self.stats = stats
+        self.stream = stream
+
+    def __iter__(self):
+        first = True
+        for frame in self.stream:
+            wall = time.perf_counter()
+            yield frame
+            self.stats.frame(time.perf_counter() - wall)
+            if first:
+                first = False
+                self.stats.first_frames.append(time.monotonic() - self.stats.started)
+
+    def close(self):
+        self.stream.close()
+
+
+# Hosts concurrent sessions of app (called as app(xr, params), once per
+# connected headset) in this process. xarp serves each connection on its own
+# thread and its sockets cannot be handed to another process, so frame loops
+# stay here; CPU-heavy asset preprocessing runs in the shared AssetManager's
+# process pool instead, and decoded assets are shared across sessions by
+# content hash. Per-session frame times are kept for sizing hardware. CPU is
+# measured for the whole process and shared out per frame of every session:
+# sessions hand work to helper threads (the pipelined sender and receiver,
+# video decoders, the session log writer), so no one thread's CPU time is a
+# session's cost. The asset process pool is not included.
+class SessionManager:
+    def __init__(self, app, max_sessions: int | None = None, metrics_path: str | None = None,
+                 interval: float = 5.0, history: int = 64):
+        self.app = app
+        self.metrics_path = metrics_path
+        self.interval = interval
+        self.ids = itertools.count(1)
+        self.lock = threading.Lock()
+        self.active: dict[int, SessionStats] = {}
+        self.finished: deque = deque(maxlen=history)
+        self.slots = threading.BoundedSemaphore(max_sessions) if max_sessions else None
+        self.refused = 0
+        self.cpu_started = time.process_time()
+        # Frames of sessions no longer in finished.
+        self.frames_dropped = 0
+
+        if metrics_path:
+            self._thread = threading.Thread(target=self._run, name="session-metrics", daemon=True)
+            self._thread.start()
+
+    def __call__(self, xr, params: dict):
+        if self.slots is not None and not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.refused += 1
+            return
+
+        stats = SessionStats(next(self.ids))
+        with self.lock:
+            self.active[stats.session] = stats
+        try:
+            self.app(SessionXR(xr, stats), params)
+        finally:
+            stats.ended = time.monotonic()
+            with self.lock:
+                del self.active[stats.session]
+                if len(self.finished) == self.finished.maxlen:
+                    self.frames_dropped += self.finished[0].frames
+                self.finished.append(stats)
+            if self.slots is not None:
+                self.slots.release()
+
+    def report(self) -> dict:
+        with self.lock:
+            sessions = list(self.active.values()) + list(self.finished)
+            refused = self.refused
+            frames = self.frames_dropped + sum(s.frames for s in sessions)
+        report = {
+            't': time.time(),
+            'active': sum(1 for s in sessions if s.ended is None),
+            'refused': refused,
+            'frames': frames,
+        }
+        if frames:
+            report['cpu_ms_per_frame'] = round((time.process_time() - self.cpu_started) / frames * 1000, 3)
+        report['sessions'] = [s.summary() for s in sessions]
+        return report
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            with open(self.metrics_path, 'a') as f:
+                f.write(json.dumps(self.report()) + "\n")
@@ -0,0 +1,131 @@
+import numpy as np
+from xarp.entities import Element
+from xarp.spatial import Quaternion, Vector3
+
+from delta import POSITION_EPSILON
+
+# Per-element fields kept in the store and their widths.
+FIELDS = {'position': 3, 'rotation': 4, 'scale': 3, 'color': 4}
+
+
+def _grow(a: np.ndarray, n: int) -> np.ndarray:
+    out = np.zeros((n,) + a.shape[1:], dtype=a.dtype)
+    out[:len(a)] = a
+    return out
+
+
+# Holds the transforms and colors of every element in contiguous arrays, one row
+# per element key. Elements updated the usual way are copied into their row and
+# passed on; layout and animation code can instead write many rows at once with
+# write(), and the rows that actually changed are copied back into their
+# Elements and sent once at the end of the frame. Sits in front of the batcher.
+class SceneStore:
+    def __init__(self, xr, capacity: int = 32, epsilon: float = POSITION_EPSILON):
+        self.xr = xr
+        self.epsilon = epsilon
+        self.rows: dict[str, int] = {}
+        self.elements: list[Element | None] = [None] * capacity
+        self.free: list[int] = list(range(capacity - 1, -1, -1))
+        self.values = {name: np.zeros((capacity, width)) for name, width in FIELDS.items()}
+        # What the elements held when they were last passed on.
+        self.sent = {name: np.zeros((capacity, width)) for name, width in FIELDS.items()}
+        self.dirty = np.zeros(capacity, dtype=bool)
+
+    def row(self, element: Element) -> int:
+        row = self.rows.get(element.key)
+        if row is None:
+            if not self.free:
+                n = len(self.elements)
+                self.elements += [None] * n
+                self.values = {name: _grow(a, 2 * n) for name, a in self.values.items()}
+                self.sent = {name: _grow(a, 2 * n) for name, a in self.sent.items()}
+                self.dirty = _grow(self.dirty, 2 * n)
+                self.free = list(range(2 * n - 1, n - 1, -1))
+            row = self.rows[element.key] = self.free.pop()
+            self._pull(row, element)
+        self.elements[row] = element
+        return row
+
+    def _pull(self, row: int, element: Element):
+        t = element.transform
+        self.values['position'][row] = t.position.to_numpy()
+        self.values['rotation'][row] = t.rotation.to_numpy() if t.rotation is not None else (0, 0, 0, 1)
+        self.values['scale'][row] = t.scale.to_numpy() if t.scale is not None else (1, 1, 1)
+        self.values['color'][row] = element.color
+
+    def _push(self, row: int, element: Element):
+        t = element.transform
+        values, sent = self.values, self.sent
+        if not np.array_equal(values['position'][row], sent['position'][row]):
+            t.position = Vector3(values['position'][row].copy())
+        if not np.array_equal(values['rotation'][row], sent['rotation'][row]):
+            t.rotation = Quaternion(values['rotation'][row].copy())
+        if not np.array_equal(values['scale'][row], sent['scale'][row]):
+            t.scale = Vector3(values['scale'][row].copy())
+        if not np.array_equal(values['color'][row], sent['color'][row]):
+            element.color = tuple(values['color'][row].tolist())
+
+    # Copy of a field for the given elements, one row each.
+    def read(self, elements: list[Element], field: str = 'position') -> np.ndarray:
+        return self.values[field][[self.row(e) for e in elements]].copy()
+
+    # Set a field of many elements at once; sent when the frame ends.
+    def write(self, elements: list[Element], values, field: str = 'position'):
+        rows = [self.row(e) for e in elements]
+        self.values[field][rows] = values
+        self.dirty[rows] = True
+
+    def update(self, element: Element):
+        row = self.row(element)
+        self._pull(row, element)
+        for name in FIELDS:
+            self.sent[name][row] = self.values[name][row]
+        self.dirty[row] = False
+        self.xr.update(element)
+
+    def destroy_element(self, element: Element):
+        row = self.rows.pop(element.key, None)
+        if row is not None:
+            self.elements[row] = None
+            self.dirty[row] = False
+            self.free.append(row)
+        self.xr.destroy_element(element)
+
+    # Send the written rows that moved by at least epsilon or changed otherwise.
+    def flush(self):
+        rows = np.flatnonzero(self.dirty)
+        if not len(rows):
+            return
+        self.dirty[rows] = False
+        values, sent = self.values, self.sent
+        changed = (np.abs(values['position'][rows] - sent['position'][rows]) >= self.epsilon).any(axis=1)
+        for name in ('rotation', 'scale', 'color'):
+            changed |= (values[name][rows] != sent[name][rows]).any(axis=1)
+        for row in rows[changed]:
+            element = self.elements[row]
+            self._push(row, element)
+            for name in FIELDS:
+                sent[name][row] = values[name][row]
+            self.xr.update(element)
+
+    def sense(self, **kwargs):
+        return StoreStream(self, self.xr.sense(**kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self.xr, name)
+
+
+class StoreStream:
+    def __init__(self, store: SceneStore, stream):
+        self.store = store
+        self.stream = stream
+
+    def __iter__(self):
+        self.store.flush()
+        for frame in self.stream:
+            yield frame
+            self.store.flush()
+
+    def close(self):
+        self.store.flush()
+        self.stream.close()
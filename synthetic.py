@@ -0,0 +1,117 @@
+import random
+
+import numpy as np
+from xarp.data_models import Hands
+from xarp.gestures import PALM, INDEX_TIP, THUMB_METACARPAL
+from xarp.spatial import Pose, Quaternion, Vector3
+
+# Scripted hand streams that walk through the app's interaction flow, for
+# benchmarks and load testing without a headset. The scripted table has the
+# right palm at RIGHT_PALM and the left palm at LEFT_PALM.
+RIGHT_PALM = np.array([0.2, 0.0, 0.0])
+LEFT_PALM = np.array([-0.2, 0.0, 0.0])
+
+# Where main() places things relative to the calibrated right palm.
+PANEL = RIGHT_PALM + [-0.6, 0.2, 0.35]
+WRENCH = RIGHT_PALM + [0.0, 0.05, 0.0]
+WHEEL_TOP = WRENCH + [0.0, 0.25, 0.0]
+
+JOINTS = 26
+_FINGER_X = (0.02, 0.005, -0.01, -0.025)
+
+
+# Joint positions (OpenXR layout) for a palm-down hand with fingers along +z.
+# The thumb sits on opposite sides for the two hands, so hand_normal points up
+# for the right hand and down for the left, as get_table_pos expects.
+def hand_joints(palm, left: bool = False, curled: bool = False, pinch: bool = False) -> np.ndarray:
+    s = 1.0 if left else -1.0
+    joints = np.zeros((JOINTS, 3))
+    joints[PALM] = (0, 0, 0)
+    joints[PALM + 1] = (0, 0, -0.05)
+
+    thumb = THUMB_METACARPAL
+    joints[thumb:thumb + 4] = [(s * 0.02, 0, -0.03), (s * 0.04, 0, 0), (s * 0.05, 0, 0.03), (s * 0.055, 0, 0.05)]
+
+    for finger, x in enumerate(_FINGER_X):
+        base = thumb + 4 + finger * 5
+        if curled:
+            joints[base:base + 5] = [(s * x, 0, -0.02), (s * x, 0, 0.03), (s * x, -0.02, 0.04), (s * x, -0.03, 0.03), (s * x, -0.03, 0.02)]
+        else:
+            joints[base:base + 5] = [(s * x, 0, -0.02), (s * x, 0, 0.03), (s * x, 0, 0.06), (s * x, 0, 0.08), (s * x, 0, 0.1)]
+
+    if pinch:
+        joints[thumb + 3] = joints[INDEX_TIP] + (s * 0.005, 0, 0)
+    return joints + np.asarray(palm, dtype=np.float64)
+
+def to_hand(joints: np.ndarray) -> tuple:
+    rotation = Quaternion.from_euler_angles(0, 0, 0)
+    return tuple(Pose(position = Vector3(row.copy()), rotation = rotation) for row in joints)
+
+# Right hand placed so that its index fingertip is at tip.
+def right_at_tip(tip, pinch: bool = False, curled: bool = False) -> tuple:
+    joints = hand_joints((0, 0, 0), curled = curled, pinch = pinch)
+    return to_hand(joints + (np.asarray(tip) - joints[INDEX_TIP]))
+
+
+def _lerp(a, b, n: int):
+    for k in range(n):
+        yield np.asarray(a) + (np.asarray(b) - np.asarray(a)) * (k / max(n - 1, 1))
+
+
+# Yields (phase, frame) pairs covering calibration through the wheel close gesture,
+# timestamped at rate frames per second. jitter is the standard deviation of
+# tracking noise in meters.
+def interaction_script(jitter: float = 0.0005, seed: int = 0, rate: float = 90.0):
+    rng = random.Random(seed)
+    count = 0
+    def noise():
+        return np.array([rng.gauss(0, jitter) for _ in range(3)])
+    def frame(right=None, left=None):
+        nonlocal count
+        count += 1
+        return {'hands': Hands(left = left, right = right), 'time': count / rate}
+
+    rest = RIGHT_PALM + [0.0, 0.15, -0.1]
+    for _ in range(60):
+        yield 'calibration', frame(
+            right = to_hand(hand_joints(RIGHT_PALM + noise())),
+            left = to_hand(hand_joints(LEFT_PALM + noise(), left = True)),
+        )
+
+    for _ in range(30):
+        yield 'pinch_guide', frame(right_at_tip(rest + noise()))
+
+    for tip in _lerp(rest, PANEL, 15):
+        yield 'panel_spawn', frame(right_at_tip(tip + noise()))
+    for _ in range(5):
+        yield 'panel_spawn', frame(right_at_tip(PANEL + noise(), pinch = True))
+
+    table = PANEL.copy()
+    table[1] = RIGHT_PALM[1] + 0.02
+    for tip in _lerp(PANEL, table, 30):
+        yield 'idea_drag', frame(right_at_tip(tip + noise(), pinch = True))
+    for _ in range(5):
+        yield 'idea_drag', frame(right_at_tip(table + noise()))
+
+    for _ in range(60):
+        yield 'video', frame(right_at_tip(rest + noise()))
+
+    for tip in _lerp(rest, WRENCH, 10):
+        yield 'wheel_open', frame(right_at_tip(tip + noise()))
+    for _ in range(3):
+        yield 'wheel_open', frame(right_at_tip(WRENCH + noise(), pinch = True))
+    for _ in range(3):
+        yield 'wheel_open', frame(right_at_tip(WRENCH + noise()))
+
+    for tip in _lerp(WRENCH, WHEEL_TOP, 10):
+        yield 'wheel_drag', frame(right_at_tip(tip + noise()))
+    for tip in _lerp(WHEEL_TOP, PANEL, 25):
+        yield 'wheel_drag', frame(right_at_tip(tip + noise(), pinch = True))
+    for _ in range(5):
+        yield 'wheel_drag', frame(right_at_tip(PANEL + noise()))
+
+    for palm in _lerp(WRENCH + [0, 0.4, 0], WRENCH + [0, 0.01, 0], 40):
+        yield 'wheel_close', frame(to_hand(hand_joints(palm + noise())))
+    for _ in range(20):
+        yield 'wheel_close', frame(right_at_tip(rest + noise()))
+
@@ -0,0 +1,213 @@
+import atexit
+import json
+import os
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+import numpy as np
+from xarp.entities import Element, TextAsset
+from xarp.spatial import Transform, Vector3
+
+# XR_TELEMETRY=<file> appends one JSON summary per interval to <file>.
+# XR_TELEMETRY_OVERLAY=1 also shows the summary as a text panel in the scene.
+# With neither set, TELEMETRY is a no-op object and instrumented code pays only
+# for a method call. Every session of the process shares TELEMETRY's buffer and
+# flush thread; per-frame state lives in each session's TELEMETRY.session().
+ENV_PATH = "XR_TELEMETRY"
+ENV_OVERLAY = "XR_TELEMETRY_OVERLAY"
+
+SPAN, UPDATE, LATENCY, COUNT = 0, 1, 2, 3
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class NullTelemetry:
+    enabled = False
+
+    def span(self, name: str):
+        return _NULL_SPAN
+
+    def session(self):
+        return self
+
+    def frame_start(self):
+        pass
+
+    def frame_end(self, xr):
+        pass
+
+    def update_sent(self, key: str):
+        pass
+
+    def count(self, name: str, n: int = 1):
+        pass
+
+    def place_overlay(self, position: Vector3):
+        pass
+
+    def close(self):
+        pass
+
+
+class Span:
+    __slots__ = ('events', 'name', 'start')
+
+    def __init__(self, events: deque, name: str):
+        self.events = events
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.events.append((SPAN, self.name, time.perf_counter_ns() - self.start))
+        return False
+
+
+# Records spans, sent updates, counters and sense-to-update latency into a bounded deque,
+# which the frame loops append to and a background thread drains; both ends are
+# atomic in CPython, so a loop never waits on a lock.
+class Telemetry:
+    enabled = True
+
+    def __init__(self, path: str | None, overlay: bool = False, interval: float = 1.0, capacity: int = 1 << 16):
+        self.path = path
+        self.interval = interval
+        self.events: deque = deque(maxlen=capacity)
+        self._stop = threading.Event()
+
+        self.overlay = overlay
+        # Latest summary as text, shown by every session's overlay.
+        self.overlay_text: str | None = None
+
+        self._thread = threading.Thread(target=self._run, name="telemetry", daemon=True)
+        self._thread.start()
+
+    def span(self, name: str) -> Span:
+        return Span(self.events, name)
+
+    # Frame timing and overlay for one session's frame loop.
+    def session(self) -> 'SessionTelemetry':
+        return SessionTelemetry(self)
+
+    def update_sent(self, key: str):
+        self.events.append((UPDATE, key, 0))
+
+    def count(self, name: str, n: int = 1):
+        self.events.append((COUNT, name, n))
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    # Drain the buffer into one summary line.
+    def flush(self):
+        spans = defaultdict(list)
+        updates = Counter()
+        counters = Counter()
+        latency = []
+        while self.events:
+            kind, name, ns = self.events.popleft()
+            if kind == SPAN:
+                spans[name].append(ns)
+            elif kind == UPDATE:
+                updates[name] += 1
+            elif kind == COUNT:
+                counters[name] += ns
+            else:
+                latency.append(ns)
+        if not latency:
+            return
+
+        summary = {
+            't': time.time(),
+            'frames': len(latency),
+            'latency_ms': _stats(latency, 1e6),
+            'spans_us': {name: _stats(samples, 1e3) for name, samples in spans.items()},
+            'updates': dict(updates),
+            'counters': dict(counters),
+        }
+        if self.path:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(summary) + "\n")
+        if self.overlay:
+            self.overlay_text = _overlay_text(summary)
+
+
+# A session's frame start and overlay panel. Sessions run their frame loops
+# concurrently, so each keeps its own; the events go to the shared Telemetry.
+class SessionTelemetry:
+    def __init__(self, telemetry: Telemetry):
+        self.telemetry = telemetry
+        self._frame_start = 0
+
+        self.overlay: Element | None = None
+        self._overlay_shown: str | None = None
+        if telemetry.overlay:
+            self.overlay = Element(
+                key = 'telemetry',
+                transform = Transform(position = Vector3.from_xyz(0, 1.2, 0.8), scale = Vector3.one() * 0.5),
+            )
+
+    def frame_start(self):
+        self._frame_start = time.perf_counter_ns()
+
+    # Called once a frame's updates have been sent.
+    def frame_end(self, xr):
+        self.telemetry.events.append((LATENCY, None, time.perf_counter_ns() - self._frame_start))
+
+        text = self.telemetry.overlay_text
+        if self.overlay is not None and text is not self._overlay_shown:
+            self._overlay_shown = text
+            self.overlay.asset = TextAsset.from_obj(text)
+            xr.update(self.overlay)
+
+    def place_overlay(self, position: Vector3):
+        if self.overlay is not None:
+            self.overlay.transform.position = position
+
+
+def _stats(samples: list[int], unit: float) -> dict:
+    values = np.array(samples) / unit
+    return {
+        'n': len(samples),
+        'p50': round(float(np.percentile(values, 50)), 3),
+        'p95': round(float(np.percentile(values, 95)), 3),
+        'max': round(float(values.max()), 3),
+    }
+
+def _overlay_text(summary: dict) -> str:
+    lat = summary['latency_ms']
+    lines = [f"{summary['frames']} frames  latency p50 {lat['p50']}ms p95 {lat['p95']}ms"]
+    for name, s in sorted(summary['spans_us'].items(), key=lambda item: -item[1]['p95']):
+        lines.append(f"{name}: p50 {s['p50']}us p95 {s['p95']}us")
+    lines.append(f"updates: {sum(summary['updates'].values())}")
+    for name, n in summary['counters'].items():
+        lines.append(f"{name}: {n}")
+    return "\n".join(lines)
+
+
+def from_env() -> Telemetry | NullTelemetry:
+    path = os.environ.get(ENV_PATH)
+    overlay = os.environ.get(ENV_OVERLAY) == "1"
+    if not path and not overlay:
+        return NullTelemetry()
+    telemetry = Telemetry(path, overlay = overlay)
+    atexit.register(telemetry.close)
+    return telemetry
+
+TELEMETRY = from_env()
@@ -0,0 +1,59 @@
+import numpy as np
+from xarp.entities import Element
+from xarp.spatial import Transform, Vector3
+
+from anim import LINEAR, Scheduler
+
+
+class RecordingXR:
+    def __init__(self):
+        self.updates = []
+
+    def update(self, element):
+        self.updates.append(element.transform.position.to_numpy().copy())
+
+
+def test_tween_follows_frame_times_not_the_clock():
+    xr = RecordingXR()
+    anim = Scheduler(xr, clock = lambda: 1000.0)
+    element = Element(key = 'e', transform = Transform(position = Vector3.zero()))
+    anim.tween(element, Vector3.zero(), Vector3.from_xyz(1, 0, 0), 1.0, easing = LINEAR, loop = False)
+
+    for t in (5.0, 5.25, 6.0, 7.0):
+        anim.tick(t)
+    assert np.allclose([p[0] for p in xr.updates], [0.0, 0.25, 1.0])
+    assert anim.rate() == 0
+
+def test_same_frame_times_give_the_same_flipbook_frames():
+    def run() -> list[int]:
+        shown = []
+        anim = Scheduler(RecordingXR())
+        anim.flipbook(shown.append, 3, 0.1)
+        for k in range(10):
+            anim.tick(k * 0.05)
+        return shown
+
+    assert run() == run() == [0, 1, 2, 0, 1]
+
+def test_rate_is_the_fastest_flipbook_unless_a_tween_runs():
+    anim = Scheduler(RecordingXR(), clock = lambda: 0.0)
+    anim.flipbook(lambda i: None, 2, 0.5)
+    anim.flipbook(lambda i: None, 2, 0.25)
+    assert anim.rate() == 4.0
+    element = Element(key = 'e', transform = Transform(position = Vector3.zero()))
+    anim.tween(element, Vector3.zero(), Vector3.one(), 1.0)
+    assert anim.rate() == float('inf')
+
+def test_timers_fire_once_on_frame_time_unless_cancelled():
+    anim = Scheduler(RecordingXR(), clock = lambda: 1000.0)
+    fired = []
+    anim.after(0.5, lambda: fired.append('a'))
+    cancelled = anim.after(0.25, lambda: fired.append('b'))
+    anim.after(0.125, lambda: fired.append('c'))
+    anim.cancel(cancelled)
+
+    for t in (5.0, 5.125, 5.375, 5.5, 6.0):
+        anim.tick(t)
+        fired.append(t)
+    assert fired == [5.0, 'c', 5.125, 5.375, 'a', 5.5, 6.0]
+    assert not anim.timers and not anim.cancelled
@@ -0,0 +1,40 @@
+import numpy as np
+
+from calibration import RunningStats, TableEstimator
+
+
+def test_running_stats_match_numpy():
+    rng = np.random.default_rng(0)
+    xs = rng.normal(size = (200, 3))
+    stats = RunningStats()
+    for x in xs:
+        stats.add(x)
+    assert np.allclose(stats.mean, xs.mean(axis = 0))
+    assert np.allclose(stats.var, xs.var(axis = 0))
+    assert stats.n_eff == 200
+
+def test_weights_count_as_repeated_samples():
+    stats = RunningStats()
+    stats.add(np.array([0.0, 0, 0]), 3.0)
+    stats.add(np.array([4.0, 0, 0]), 1.0)
+    assert np.allclose(stats.mean, [1, 0, 0])
+    assert np.allclose(stats.var, [3, 0, 0])
+
+def test_estimator_converges_on_steady_palms_and_ignores_outliers():
+    rng = np.random.default_rng(1)
+    left, right = np.array([-.2, .8, -.4]), np.array([.2, .8, -.4])
+    estimator = TableEstimator()
+    frames = 0
+    while not estimator.converged:
+        frames += 1
+        # Tracking jumps away for one frame in ten.
+        jump = np.array([0, .2, 0]) if frames % 10 == 0 else 0
+        estimator.add(left + rng.normal(0, .001, 3) + jump, right + rng.normal(0, .001, 3),
+                      np.array([0, 1.0, 0]))
+        estimator.add(left, right, np.array([0, -1.0, 0]), pose_ok = False)
+        assert frames < 200
+    table = estimator.result()
+    assert np.allclose(table.left, left, atol = .005)
+    assert np.allclose(table.right, right, atol = .005)
+    assert np.allclose(table.normal, [0, 1, 0])
+    assert estimator.frames == frames
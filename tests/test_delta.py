@@ -0,0 +1,41 @@
+from xarp.entities import Element
+from xarp.spatial import Transform, Vector3
+
+from delta import DeltaEncoder, POSITION_EPSILON
+
+
+def _element(x: float) -> Element:
+    return Element(key = 'e', transform = Transform(position = Vector3.from_xyz(x, 0, 0)))
+
+def _send(encoder: DeltaEncoder, element: Element) -> dict:
+    changed = encoder.diff(element)
+    encoder.commit(element.key, changed)
+    return changed
+
+
+def test_first_update_sends_every_field():
+    assert 'position' in _send(DeltaEncoder(), _element(0))
+
+def test_jitter_across_a_rounding_boundary_is_not_sent():
+    encoder = DeltaEncoder()
+    # Straddles 0.0005, where rounding to a 1 mm grid would flip every frame.
+    _send(encoder, _element(0.0004))
+    for x in (0.0006, 0.0004, 0.0006, 0.0004):
+        assert 'position' not in _send(encoder, _element(x))
+
+def test_deadband_is_against_the_last_position_sent():
+    encoder = DeltaEncoder()
+    _send(encoder, _element(0))
+    step = POSITION_EPSILON * 0.6
+    assert 'position' not in _send(encoder, _element(step))
+    # Slow drift accumulates against what the client has and is eventually sent.
+    assert 'position' in _send(encoder, _element(2 * step))
+    assert 'position' not in _send(encoder, _element(2 * step + step / 2))
+
+def test_cleared_asset_keeps_the_clients_copy():
+    encoder = DeltaEncoder()
+    element = _element(0)
+    element.asset = object()
+    _send(encoder, element)
+    element.asset = None
+    assert _send(encoder, element) == {}
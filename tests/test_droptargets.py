@@ -0,0 +1,62 @@
+import numpy as np
+from xarp.data_models import Hands
+from xarp.spatial import Vector3
+
+import synthetic
+from droptargets import DROP, ENTER, EXIT, DropTargets
+
+
+def _frame(x: float, y: float = 0.0, z: float = 0.0) -> dict:
+    return {'hands': Hands(left = None, right = synthetic.right_at_tip(np.array([x, y, z])))}
+
+def _events(drops: DropTargets) -> list:
+    events = []
+    for event in (ENTER, EXIT, DROP):
+        drops.on(event, lambda key, event = event: events.append((event, key)))
+    return events
+
+
+def test_a_sphere_stepped_over_between_frames_is_hit():
+    drops = DropTargets()
+    drops.sphere('s', Vector3.from_xyz(0, 0, 0), 0.05)
+    events = _events(drops)
+    drops.update(_frame(-0.5))
+    drops.update(_frame(0.5))
+    assert drops.hit('s')
+    assert events == [(ENTER, 's'), (EXIT, 's')]
+    drops.update(_frame(0.6))
+    assert not drops.hit('s')
+
+def test_a_plane_is_inside_behind_its_normal():
+    drops = DropTargets()
+    drops.plane('p', Vector3.from_xyz(0, 0, 0), Vector3.up())
+    events = _events(drops)
+    drops.update(_frame(0, 0.1))
+    assert not drops.hit('p')
+    drops.update(_frame(0, -0.1))
+    drops.update(_frame(0, -0.2))
+    assert drops.hit('p')
+    assert events == [(ENTER, 'p')]
+
+def test_a_disc_is_hit_through_its_face_not_beside_it():
+    drops = DropTargets()
+    drops.disc('d', Vector3.from_xyz(0, 0, 0), Vector3.up(), 0.1)
+    events = _events(drops)
+    drops.update(_frame(0.5, 0.2))
+    drops.update(_frame(0.5, -0.2))
+    assert not drops.hit('d')
+    # Through the face on the way to a point beside it.
+    drops.update(_frame(-0.2, 0.2))
+    drops.update(_frame(0.3, -0.2))
+    assert drops.hit('d')
+    assert events == [(ENTER, 'd'), (EXIT, 'd')]
+
+def test_drop_fires_only_over_a_hit_target():
+    drops = DropTargets()
+    drops.sphere('s', Vector3.from_xyz(0, 0, 0), 0.05)
+    events = _events(drops)
+    drops.update(_frame(1.0))
+    assert not drops.drop('s')
+    drops.update(_frame(0.0))
+    assert drops.drop('s')
+    assert events[-1] == (DROP, 's')
@@ -0,0 +1,38 @@
+import numpy as np
+
+from filtering import HandFilter
+
+
+def _joints(x: float) -> np.ndarray:
+    return np.full((1, 2, 3), x)
+
+
+def test_jitter_at_rest_is_smoothed():
+    rng = np.random.default_rng(0)
+    hand_filter = HandFilter()
+    raw, out = [], []
+    for i in range(200):
+        x = _joints(0) + rng.normal(0, .002, (1, 2, 3))
+        raw.append(x)
+        out.append(hand_filter(['right'], x, i / 90))
+    assert np.std(out[50:]) < np.std(raw[50:]) / 2
+
+def test_fast_motion_keeps_up():
+    hand_filter = HandFilter()
+    for i in range(90):
+        out = hand_filter(['right'], _joints(i / 90), i / 90)
+    # Within a centimeter of a hand moving 1 m/s.
+    assert abs(out[0, 0, 0] - 89 / 90) < .01
+
+def test_a_lost_hand_restarts_from_its_raw_position():
+    hand_filter = HandFilter()
+    hand_filter(['left', 'right'], np.concatenate((_joints(0), _joints(0))), 0.0)
+    hand_filter(['right'], _joints(0), 0.1)
+    out = hand_filter(['left', 'right'], np.concatenate((_joints(1), _joints(0))), 0.2)
+    assert np.allclose(out[0], 1)
+
+def test_horizon_extrapolates_along_the_velocity():
+    hand_filter = HandFilter(horizon = 0.1)
+    for i in range(90):
+        out = hand_filter(['right'], _joints(i / 90), i / 90)
+    assert out[0, 0, 0] > 89 / 90 + .05
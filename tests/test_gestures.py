@@ -0,0 +1,38 @@
+from xarp.data_models import Hands
+from xarp.gestures import INDEX_TIP, THUMB_METACARPAL
+
+import synthetic
+from filtering import HandFilter
+from gesture_state import GestureTracker
+from hands import filter_hands
+
+
+# A right hand with its thumb tip gap meters from its index fingertip.
+def _frame(gap: float, t: float) -> dict:
+    joints = synthetic.hand_joints(synthetic.RIGHT_PALM)
+    joints[THUMB_METACARPAL + 3] = joints[INDEX_TIP] + (-gap, 0, 0)
+    return {'hands': Hands(left = None, right = synthetic.to_hand(joints)), 'time': t}
+
+
+def test_a_quick_pinch_releases_through_the_filter():
+    hand_filter = HandFilter()
+    tracker = GestureTracker()
+    gaps = [0.06] * 10 + [0.005] * 2 + [0.04] * 10
+    started = ended = 0
+    for i, gap in enumerate(gaps):
+        frame = _frame(gap, i / 90)
+        filter_hands(frame, hand_filter)
+        tracker.update(frame)
+        started += tracker.right.pinch_start
+        ended += tracker.right.pinch_end
+    assert started == 1 and ended == 1
+    assert not tracker.right.pinching
+
+def test_a_pinch_hovering_at_the_threshold_does_not_flicker():
+    tracker = GestureTracker()
+    events = []
+    tracker.on('pinch_start', lambda side, g: events.append('start'))
+    tracker.on('pinch_end', lambda side, g: events.append('end'))
+    for i, gap in enumerate([0.03, 0.019, 0.021, 0.019, 0.022, 0.04]):
+        tracker.update(_frame(gap, i / 90))
+    assert events == ['start', 'end']
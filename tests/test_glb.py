@@ -0,0 +1,142 @@
+import io
+import json
+import struct
+
+import numpy as np
+from PIL import Image
+
+import glb
+
+
+# A GLB with one textured grid mesh in its scene, skin joints on the grid, and
+# a second mesh only an unreachable node uses.
+def grid_glb(n: int = 20, texture: int = 256) -> bytes:
+    u, v = np.meshgrid(np.linspace(0, 1, n), np.linspace(0, 1, n))
+    positions = np.stack([u.ravel(), np.zeros(n * n), v.ravel()], axis=1).astype(np.float32)
+    normals = np.tile(np.float32([0, 1, 0]), (n * n, 1))
+    texcoords = np.stack([u.ravel(), v.ravel()], axis=1).astype(np.float32)
+    joints = np.zeros((n * n, 4), np.uint8)
+    quads = (np.arange(n - 1)[:, None] * n + np.arange(n - 1)).ravel()
+    indices = np.concatenate([np.stack([quads, quads + n, quads + 1], axis=1),
+                              np.stack([quads + 1, quads + n, quads + n + 1], axis=1)]).astype(np.uint16).ravel()
+    png = io.BytesIO()
+    Image.new('RGB', (texture, texture), (200, 40, 40)).save(png, format='PNG')
+
+    binary = bytearray()
+    views, accessors = [], []
+    def add(data: bytes) -> int:
+        binary.extend(b'\0' * (-len(binary) % 4))
+        views.append({'buffer': 0, 'byteOffset': len(binary), 'byteLength': len(data)})
+        binary.extend(data)
+        return len(views) - 1
+    def accessor(array: np.ndarray, ctype: int, kind: str, bounds: bool = False) -> int:
+        entry = {'bufferView': add(array.tobytes()), 'componentType': ctype, 'count': len(array), 'type': kind}
+        if bounds:
+            entry['min'], entry['max'] = array.min(axis=0).tolist(), array.max(axis=0).tolist()
+        accessors.append(entry)
+        return len(accessors) - 1
+
+    primitive = {
+        'attributes': {
+            'POSITION': accessor(positions, 5126, 'VEC3', bounds = True),
+            'NORMAL': accessor(normals, 5126, 'VEC3'),
+            'TEXCOORD_0': accessor(texcoords, 5126, 'VEC2'),
+            'JOINTS_0': accessor(joints, 5121, 'VEC4'),
+        },
+        'indices': accessor(indices, 5123, 'SCALAR'),
+        'material': 0,
+    }
+    unused = {'attributes': {'POSITION': accessor(positions[:3], 5126, 'VEC3', bounds = True)}}
+    doc = {
+        'asset': {'version': '2.0'},
+        'scene': 0,
+        'scenes': [{'nodes': [0]}],
+        'nodes': [{'children': [1]}, {'mesh': 0, 'translation': [0, 1, 0]}, {'mesh': 1}],
+        'meshes': [{'primitives': [primitive]}, {'primitives': [unused]}],
+        'materials': [{'pbrMetallicRoughness': {'baseColorTexture': {'index': 0}}}],
+        'textures': [{'source': 0, 'sampler': 0}],
+        'images': [{'bufferView': add(png.getvalue()), 'mimeType': 'image/png'}],
+        'samplers': [{}],
+        'accessors': accessors,
+        'bufferViews': views,
+        'buffers': [{'byteLength': len(binary)}],
+    }
+    text = json.dumps(doc).encode()
+    text += b' ' * (-len(text) % 4)
+    binary.extend(b'\0' * (-len(binary) % 4))
+    return (struct.pack('<4sII', b'glTF', 2, 28 + len(text) + len(binary))
+            + struct.pack('<II', len(text), glb.JSON_CHUNK) + text
+            + struct.pack('<II', len(binary), glb.BIN_CHUNK) + bytes(binary))
+
+
+# Parse an optimized file, checking that its header gives its length, that
+# every buffer view lies inside the binary chunk on a 4-byte boundary, that
+# vertex attributes have 4-byte aligned elements and that every accessor's last
+# element lies inside its view.
+def parse_checked(raw: bytes) -> tuple[dict, bytes]:
+    assert struct.unpack_from('<I', raw, 8)[0] == len(raw)
+    doc, binary = glb.parse(raw)
+    assert doc['buffers'] == [{'byteLength': len(binary)}]
+    for view in doc['bufferViews']:
+        assert view['byteOffset'] % 4 == 0
+        assert view['byteOffset'] + view['byteLength'] <= len(binary)
+    for accessor in doc['accessors']:
+        view = doc['bufferViews'][accessor['bufferView']]
+        item = np.dtype(glb.COMPONENTS[accessor['componentType']]).itemsize * glb.TYPES[accessor['type']]
+        stride = view.get('byteStride', item)
+        if view.get('target') == glb.ARRAY_BUFFER:
+            assert stride % 4 == 0
+        assert stride * (accessor['count'] - 1) + item <= view['byteLength']
+    return doc, binary
+
+
+def test_optimize_keeps_the_rendered_mesh_and_texture():
+    raw = grid_glb()
+    source, source_binary = glb.parse(raw)
+    doc, binary = parse_checked(glb.optimize(raw))
+
+    assert len(doc['meshes']) == len(doc['textures']) == len(doc['images']) == len(doc['materials']) == 1
+    assert len(doc['nodes']) == 2
+    primitive = doc['meshes'][0]['primitives'][0]
+    assert set(primitive['attributes']) == {'POSITION', 'NORMAL', 'TEXCOORD_0'}
+    for name in ('POSITION', 'NORMAL', 'TEXCOORD_0'):
+        before = glb.read_accessor(source, source_binary, source['meshes'][0]['primitives'][0]['attributes'][name])
+        assert np.array_equal(glb.read_accessor(doc, binary, primitive['attributes'][name]), before)
+    before = glb.read_accessor(source, source_binary, source['meshes'][0]['primitives'][0]['indices'])
+    assert np.array_equal(glb.read_accessor(doc, binary, primitive['indices']), before)
+
+    image = Image.open(io.BytesIO(glb._view_bytes(doc, binary, doc['images'][0]['bufferView'])))
+    assert image.size == (256, 256)
+    assert glb.model_size(glb.optimize(raw)) == glb.model_size(raw)
+
+def test_lower_detail_decimates_and_downsamples_but_keeps_the_model():
+    raw = grid_glb()
+    source, _ = glb.parse(raw)
+    triangles = source['accessors'][source['meshes'][0]['primitives'][0]['indices']]['count'] // 3
+    lod = len(glb.LOD_PIXELS) - 1
+    doc, binary = parse_checked(glb.optimize(raw, lod))
+
+    assert len(doc['meshes']) == len(doc['textures']) == len(doc['images']) == 1
+    primitive = doc['meshes'][0]['primitives'][0]
+    assert 0 < doc['accessors'][primitive['indices']]['count'] // 3 <= triangles
+    image = Image.open(io.BytesIO(glb._view_bytes(doc, binary, doc['images'][0]['bufferView'])))
+    assert image.size == (glb.LOD_PIXELS[lod],) * 2
+    assert abs(glb.model_size(glb.optimize(raw, lod)) - glb.model_size(raw)) < 0.05
+
+def test_quantized_attributes_are_aligned_and_decode_close_to_the_source():
+    raw = grid_glb()
+    doc, binary = parse_checked(glb.optimize(raw, quantize_attributes = True))
+    assert doc['extensionsRequired'] == ['KHR_mesh_quantization']
+
+    attributes = doc['meshes'][0]['primitives'][0]['attributes']
+    normals = glb.read_accessor(doc, binary, attributes['NORMAL'])
+    assert normals.dtype == np.int8 and doc['bufferViews'][doc['accessors'][attributes['NORMAL']]['bufferView']]['byteStride'] == 4
+    assert np.allclose(normals / 127, [0, 1, 0])
+    texcoords = glb.read_accessor(doc, binary, attributes['TEXCOORD_0'])
+    assert texcoords.dtype == np.uint16 and texcoords.max() == 65535
+
+def test_lod_for_picks_the_coarsest_level_that_holds_up():
+    assert glb.lod_for(2000) == 0
+    assert glb.lod_for(1024) == 1
+    assert glb.lod_for(300) == 2
+    assert glb.lod_for(10) == len(glb.LOD_PIXELS) - 1
@@ -0,0 +1,50 @@
+import math
+
+import numpy as np
+from xarp.data_models import Hands
+from xarp.entities import Element
+from xarp.spatial import Transform, Vector3
+
+import synthetic
+from hittest import HitIndex
+
+
+def _element(key: str, position) -> Element:
+    return Element(key = key, transform = Transform(position = Vector3(np.array(position, dtype = float))))
+
+
+def test_query_matches_brute_force():
+    rng = np.random.default_rng(0)
+    hits = HitIndex(cell = 0.1)
+    elements = {}
+    for i in range(100):
+        element = _element(f"e{i}", rng.uniform(-1, 1, 3))
+        # Some radii span several cells.
+        radius = float(rng.uniform(0.05, 0.3))
+        hits.add(element, radius)
+        elements[element.key] = (element.transform.position.to_numpy(), radius)
+
+    for point in rng.uniform(-1, 1, (50, 3)):
+        expected = {key for key, (p, r) in elements.items() if math.dist(point, p) < r}
+        assert set(hits.query(point)) == expected
+
+def test_moved_and_removed_elements():
+    hits = HitIndex(cell = 0.1)
+    element = _element('e', [0, 0, 0])
+    hits.add(element, 0.05)
+    element.transform.position = Vector3.from_xyz(1, 0, 0)
+    hits.move(element)
+    assert 'e' not in hits.query(np.zeros(3))
+    assert 'e' in hits.query(np.array([1.0, 0, 0]))
+    hits.remove(element)
+    assert hits.query(np.array([1.0, 0, 0])) == {}
+
+def test_nearest_picks_the_closest_candidate():
+    tip = synthetic.PANEL
+    hits = HitIndex()
+    hits.add(_element('near', tip + [0.02, 0, 0]), 0.1)
+    hits.add(_element('far', tip + [0.05, 0, 0]), 0.1)
+    hits.add(_element('other', tip), 0.1)
+    frame = {'hands': Hands(left = None, right = synthetic.right_at_tip(tip))}
+    assert hits.nearest(frame, {'near', 'far'}) == 'near'
+    assert hits.nearest(frame, {'missing'}) is None
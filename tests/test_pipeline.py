@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+from xarp.entities import Element
+
+from pipeline import PipelinedXR
+
+
+class FailingXR:
+    def __init__(self):
+        self.sent = []
+
+    def update(self, element):
+        if element.key == 'bad':
+            raise ConnectionError("lost")
+        self.sent.append(element.key)
+
+    def sense(self, **kwargs):
+        return Frames([{'time': 0.0}])
+
+
+class Frames(list):
+    def close(self):
+        pass
+
+
+def test_close_sends_everything_queued():
+    inner = FailingXR()
+    xr = PipelinedXR(inner)
+    stream = xr.sense()
+    for key in 'abc':
+        xr.update(Element(key = key))
+    list(stream)
+    stream.close()
+    assert inner.sent == ['a', 'b', 'c']
+
+def test_send_error_is_raised_in_the_frame_loop():
+    xr = PipelinedXR(FailingXR())
+    xr.update(Element(key = 'bad'))
+    with pytest.raises(ConnectionError):
+        xr.drain()
+    with pytest.raises(ConnectionError):
+        xr.update(Element(key = 'a'))
+
+def test_close_stops_the_sender():
+    inner = FailingXR()
+    xr = PipelinedXR(inner)
+    xr.update(Element(key = 'a'))
+    xr.close()
+    assert not xr.sender.is_alive()
+    assert inner.sent == ['a']
+
+def test_closing_a_stalled_stream_gives_up():
+    class Stalled:
+        def __iter__(self):
+            threading.Event().wait()
+            yield {}
+        def close(self):
+            pass
+    class StalledXR(FailingXR):
+        def sense(self, **kwargs):
+            return Stalled()
+    stream = PipelinedXR(StalledXR()).sense()
+    start = time.monotonic()
+    stream.close(timeout = 0.1)
+    assert time.monotonic() - start < 1
@@ -0,0 +1,104 @@
+import itertools
+
+import numpy as np
+from xarp.data_models import Hands
+from xarp.entities import Element
+from xarp.spatial import Pose, Quaternion, Vector3
+
+import replay
+import synthetic
+from hands import hand_array
+from replay import RecordingXR, ReplayXR
+
+
+class ScriptedXR:
+    def __init__(self, frames: list[dict]):
+        self.frames = iter(frames)
+        self.calls = []
+
+    def sense(self, **kwargs):
+        return ScriptedStream(self)
+
+    def update(self, element):
+        self.calls.append(('update', element.key))
+
+    def destroy_element(self, element):
+        self.calls.append(('destroy_element', element.key))
+
+class ScriptedStream:
+    def __init__(self, xr: ScriptedXR):
+        self.xr = xr
+
+    def __iter__(self):
+        return self.xr.frames
+
+    def close(self):
+        pass
+
+
+def _frames() -> list[dict]:
+    eye = Pose(position = Vector3.from_xyz(0, 1.6, 0), rotation = Quaternion.from_euler_angles(0, 0, 0))
+    both = Hands(left = synthetic.to_hand(synthetic.hand_joints(synthetic.LEFT_PALM, left = True)),
+                 right = synthetic.to_hand(synthetic.hand_joints(synthetic.RIGHT_PALM)))
+    return [
+        {'hands': both, 'eye': eye},
+        {'hands': Hands(left = None, right = synthetic.right_at_tip(synthetic.PANEL)), 'eye': eye},
+        {'hands': Hands(left = None, right = None), 'eye': eye},
+        {'hands': Hands(left = None, right = synthetic.right_at_tip(synthetic.WRENCH, pinch = True)), 'eye': eye},
+    ]
+
+# Two sense streams of two frames each, updating an element per frame and
+# destroying it between the streams, like main's calibration then interaction.
+def _app(xr) -> list[dict]:
+    seen = []
+    element = Element(key = 'e')
+    for _ in range(2):
+        stream = xr.sense(hands = True, eye = True)
+        for frame in itertools.islice(stream, 2):
+            seen.append(frame)
+            element.key = 'right' if frame['hands'].right else 'none'
+            xr.update(element)
+        stream.close()
+        xr.destroy_element(element)
+    return seen
+
+
+def test_recorded_session_replays_the_same_frames_times_and_updates(tmp_path, monkeypatch):
+    clock = iter([100.0, 100.0, 100.0078125, 100.015625, 100.5])
+    monkeypatch.setattr(replay.time, 'monotonic', lambda: next(clock))
+    path = tmp_path / "s.xrs"
+    source = ScriptedXR(_frames())
+    recorder = RecordingXR(source, path)
+    recorded = _app(recorder)
+    recorder.close()
+    monkeypatch.undo()
+
+    xr = ReplayXR(path, realtime = False)
+    replayed = _app(xr)
+
+    assert [frame['time'] for frame in replayed] == [0.0, 0.0078125, 0.015625, 0.5]
+    assert [t for t, _ in replay.read_frames(path)] == [0.0, 0.0078125, 0.015625, 0.5]
+    assert len(replayed) == len(recorded) == 4
+    for before, after in zip(recorded, replayed):
+        for side in ('left', 'right'):
+            hand = getattr(before['hands'], side)
+            if hand:
+                assert np.allclose(hand_array(getattr(after['hands'], side)), hand_array(hand), atol = 1e-6)
+            else:
+                assert not getattr(after['hands'], side)
+        assert np.allclose(after['eye'].position.to_numpy(), before['eye'].position.to_numpy())
+
+    assert [(kind, key) for _, kind, key in xr.calls] == source.calls
+    assert [frame for frame, kind, _ in xr.calls if kind == 'update'] == [0, 1, 2, 3]
+
+def test_replay_only_serves_the_channels_sensed(tmp_path):
+    path = tmp_path / "s.xrs"
+    recorder = RecordingXR(ScriptedXR(_frames()), path)
+    stream = recorder.sense(hands = True, eye = True)
+    list(stream)
+    stream.close()
+    recorder.close()
+
+    frames = list(ReplayXR(path, realtime = False).sense(hands = True))
+    assert len(frames) == 4
+    assert all(set(frame) == {'hands', 'time'} for frame in frames)
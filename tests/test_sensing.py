@@ -0,0 +1,30 @@
+from xarp.data_models import Hands
+
+from sensing import AdaptiveXR
+
+
+class Frames(list):
+    def close(self):
+        pass
+
+class ScriptedXR:
+    def sense(self, **kwargs):
+        # Two seconds without hands at 90 Hz.
+        return Frames({'time': i / 90, 'hands': Hands(left = None, right = None)} for i in range(180))
+
+
+def _passed(rate: float) -> int:
+    xr = AdaptiveXR(ScriptedXR(), idle_rate = 10, idle_after = 0.5)
+    xr.rate = lambda: rate
+    return len(list(xr.sense()))
+
+def test_idle_frames_are_thinned_to_the_idle_rate():
+    # 45 frames before idling, then 10 a second for 1.5 seconds.
+    assert 59 <= _passed(0.0) <= 62
+
+def test_slow_animations_do_not_raise_the_idle_rate():
+    assert _passed(2.0) == _passed(0.0)
+
+def test_animations_faster_than_the_idle_rate_get_their_rate():
+    assert 75 <= _passed(30.0) <= 92
+    assert _passed(float('inf')) == 180
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from xarp.data_models import Hands
+
+import main
+import synthetic
+from filtering import HandFilter
+from hands import filter_hands, hand_array, hand_features
+from sessionlog import JOINTS, LEFT, RIGHT, SessionLog, read_log
+
+
+def _frame() -> dict:
+    return {'hands': Hands(left = None, right = synthetic.right_at_tip(synthetic.PANEL))}
+
+
+def test_frames_and_events_round_trip(tmp_path):
+    log = SessionLog(tmp_path / "s.xrl", block = 4)
+    for i in range(10):
+        log.frame(_frame())
+        if i % 3 == 0:
+            log.event('wheel_held', i)
+    log.close()
+
+    read = read_log(tmp_path / "s.xrl")
+    assert len(read['t']) == 10
+    assert (read['hands'] == RIGHT).all() and not (read['hands'] & LEFT).any()
+    assert np.isnan(read['joints'][:, 0]).all()
+    joints = synthetic.right_at_tip(synthetic.PANEL)
+    assert np.allclose(read['joints'][0, 1, :len(joints)], [j.position.to_numpy() for j in joints][:JOINTS], atol = 1e-6)
+    assert list(read['event_name']) == ['wheel_held'] * 4
+    assert list(read['event_value']) == [0, 3, 6, 9]
+    assert list(read['event_frame']) == [1, 4, 7, 10]
+
+def test_log_is_closed_when_the_session_fails(tmp_path, monkeypatch):
+    monkeypatch.setenv("XR_LOG", str(tmp_path))
+    def interact(xr, sensing, log):
+        log.frame(_frame())
+        raise ConnectionError("headset gone")
+    monkeypatch.setattr(main, 'interact', interact)
+
+    with pytest.raises(ConnectionError):
+        main.main(object(), {})
+    (path,) = tmp_path.iterdir()
+    assert len(read_log(path)['t']) == 1
+
+def test_raw_joints_are_logged_not_filtered_ones(tmp_path):
+    hand_filter = HandFilter(horizon = 0.05)
+    log = SessionLog(tmp_path / "s.xrl")
+    for i, x in enumerate((0.0, 0.1)):
+        right = synthetic.right_at_tip(synthetic.PANEL + [x, 0, 0])
+        frame = {'hands': Hands(left = None, right = right), 'time': i / 90}
+        filter_hands(frame, hand_filter)
+        log.frame(frame)
+    log.close()
+
+    logged = read_log(tmp_path / "s.xrl")['joints'][1, 1, :len(right)]
+    assert np.allclose(logged, hand_array(right), atol = 1e-6)
+    assert not np.allclose(logged, hand_features(frame).right.joints, atol = 1e-3)
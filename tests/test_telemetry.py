@@ -0,0 +1,37 @@
+import time
+
+from telemetry import LATENCY, Telemetry
+
+
+class CountingXR:
+    def __init__(self):
+        self.updates = []
+
+    def update(self, element):
+        self.updates.append(element.key)
+
+
+def test_sessions_keep_their_own_frame_start_and_overlay():
+    telemetry = Telemetry(None, overlay = True, interval = 3600)
+    try:
+        slow, fast = telemetry.session(), telemetry.session()
+        slow_xr, fast_xr = CountingXR(), CountingXR()
+
+        # The fast session runs a whole frame while the slow one is mid-frame.
+        slow.frame_start()
+        time.sleep(0.05)
+        fast.frame_start()
+        fast.frame_end(fast_xr)
+        slow.frame_end(slow_xr)
+
+        latency = sorted(ns for kind, _, ns in telemetry.events if kind == LATENCY)
+        assert latency[0] < 0.04e9 < 0.05e9 <= latency[1]
+
+        # Each session sends the shared summary to its own client once.
+        telemetry.overlay_text = "summary"
+        for _ in range(2):
+            slow.frame_end(slow_xr)
+            fast.frame_end(fast_xr)
+        assert slow_xr.updates == fast_xr.updates == ['telemetry']
+    finally:
+        telemetry.close()
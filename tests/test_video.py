@@ -0,0 +1,85 @@
+import threading
+
+from PIL import Image
+from xarp.spatial import Transform, Vector3
+
+import video
+from anim import Scheduler
+from video import VideoPlayer
+from visibility import Visibility
+
+
+class RecordingXR:
+    def update(self, element):
+        pass
+
+
+def _clip(path, count: int) -> list:
+    paths = []
+    for i in range(count):
+        paths.append(path / f"{i}.png")
+        Image.new('RGB', (4, 4), (i * 40, 0, 0)).save(paths[-1])
+    return paths
+
+
+def test_playback_recovers_after_decoding_falls_behind(tmp_path, monkeypatch):
+    # Decoding blocks before frame 2 until the playhead is well past it.
+    gate = threading.Event()
+    read = video.FrameSource.read
+    def slow_read(source, i):
+        if i == 2:
+            gate.wait()
+        return read(source, i)
+    monkeypatch.setattr(video.FrameSource, 'read', slow_read)
+
+    anim = Scheduler(RecordingXR(), clock = lambda: 0.0)
+    player = VideoPlayer(Visibility(RecordingXR()), anim, 'v', _clip(tmp_path, 6), 1.0,
+                         Transform(position = Vector3.zero(), scale = Vector3.one()), capacity = 2)
+    player.preload()
+    player.clip.wait()
+    player.play()
+    for t in range(6):
+        anim.tick(float(t))
+    # Frame 1 is held while frame 2 is missing.
+    assert player.loaded[player.seq % 2] == player.seq == 1
+
+    gate.set()
+    player.clip.wait()
+    anim.tick(6.0)
+    assert player.seq == 2 and player.shown is player.slots[0]
+    player.clip.wait()
+    anim.tick(7.0)
+    assert player.seq == 3 and player.shown is player.slots[1]
+    player.destroy()
+
+def test_players_of_a_clip_share_its_frames(tmp_path):
+    anim = Scheduler(RecordingXR(), clock = lambda: 0.0)
+    transform = Transform(position = Vector3.zero(), scale = Vector3.one())
+    paths = _clip(tmp_path, 3)
+    first = VideoPlayer(Visibility(RecordingXR()), anim, 'a', paths, 1.0, transform)
+    second = VideoPlayer(Visibility(RecordingXR()), anim, 'b', paths, 1.0, transform)
+    assert first.clip is second.clip
+    clip = first.clip
+    first.destroy()
+    assert video.shared_clip(paths, 1.0) is clip
+    video.release_clip(clip)
+    second.destroy()
+    # The last player gone, the clip is dropped and its decoder stops.
+    clip.decoder.join(timeout = 5)
+    assert not clip.decoder.is_alive()
+    fresh = video.shared_clip(paths, 1.0)
+    assert fresh is not clip
+    video.release_clip(fresh)
+
+def test_a_long_clip_keeps_a_bounded_number_of_frames(tmp_path):
+    anim = Scheduler(RecordingXR(), clock = lambda: 0.0)
+    player = VideoPlayer(Visibility(RecordingXR()), anim, 'v', _clip(tmp_path, 40), 1.0,
+                         Transform(position = Vector3.zero(), scale = Vector3.one()), capacity = 2)
+    player.play()
+    for t in range(80):
+        player.clip.wait()
+        anim.tick(float(t))
+        assert len(player.clip.frames) <= player.clip.capacity
+    # Playback kept up throughout: seq counts every frame.
+    assert player.seq == 79
+    player.destroy()
@@ -0,0 +1,57 @@
+import numpy as np
+from xarp.data_models import Hands
+from xarp.entities import Element
+from xarp.spatial import Transform, Vector3
+
+import main
+import synthetic
+from hittest import HitIndex
+from visibility import Visibility
+
+
+class RecordingXR:
+    def __init__(self):
+        self.updates = []
+
+    def update(self, element):
+        self.updates.append(element.key)
+
+
+def _panel() -> Element:
+    return Element(key = 'panel', transform = Transform(position = Vector3(synthetic.PANEL.copy())))
+
+def _frame_at_panel() -> dict:
+    return {'hands': Hands(left = None, right = synthetic.right_at_tip(synthetic.PANEL))}
+
+
+def test_hide_and_show_send_only_transitions():
+    xr = RecordingXR()
+    visibility = Visibility(xr)
+    panel = _panel()
+    visibility.hide(panel)
+    visibility.hide(panel)
+    visibility.show(panel)
+    visibility.show(panel)
+    assert xr.updates == ['panel', 'panel']
+    assert visibility.visible(panel)
+
+def test_show_at_position_moves_a_shown_element():
+    xr = RecordingXR()
+    visibility = Visibility(xr)
+    panel = _panel()
+    visibility.show(panel, Vector3.from_xyz(1, 2, 3))
+    assert np.allclose(panel.transform.position.to_numpy(), (1, 2, 3))
+    assert xr.updates == ['panel']
+
+def test_hidden_element_is_not_hit():
+    visibility = Visibility(RecordingXR())
+    panel = _panel()
+    hits = HitIndex()
+    hits.add(panel, .2)
+
+    assert main.ui_touching(panel, _frame_at_panel(), .2, hits)
+    visibility.hide(panel)
+    assert not main.ui_touching(panel, _frame_at_panel(), .2, hits)
+    assert hits.nearest(_frame_at_panel(), {'panel'}) is None
+    visibility.show(panel)
+    assert main.ui_touching(panel, _frame_at_panel(), .2, hits)
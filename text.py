@@ -0,0 +1,58 @@
+import functools
+import os
+import time
+
+from xarp.entities import Element, TextAsset
+from xarp.spatial import Transform, Vector3
+
+# XR_LABEL_HZ=<n> caps how many times per second a label's dynamic line changes.
+LABEL_RATE = float(os.environ.get("XR_LABEL_HZ", 10))
+
+# Height of a label's dynamic line above its static body, in meters.
+LINE_OFFSET = 0.04
+
+
+# One asset per distinct text, so repeated text is not rebuilt and the batcher
+# sees the same asset object and does not resend it.
+@functools.lru_cache(maxsize=256)
+def text_asset(text: str) -> TextAsset:
+    return TextAsset.from_obj(text)
+
+
+# A label split into a static body, sent once, and a short dynamic line shown
+# above it. The line is only resent when its text changes, and at most rate
+# times per second; changes in between are shown at the next refresh.
+class Label:
+    def __init__(self, xr, key: str, static: str, rate: float = LABEL_RATE, clock = time.monotonic):
+        self.xr = xr
+        self.rate = rate
+        self.clock = clock
+        self.body = Element(key = key, transform = Transform(position = Vector3.zero()), asset = text_asset(static))
+        self.line = Element(key = f"{key}_line", transform = Transform(position = Vector3.zero()))
+        self.text: str | None = None
+        self.shown: str | None = None
+        self.refreshed = float('-inf')
+
+    def set(self, text: str):
+        self.text = text
+
+    # Place the label with its body at position, and send whatever changed. t is
+    # the sensed frame's time, if it has one.
+    def move(self, position: Vector3, t: float | None = None):
+        self.body.transform.position = position
+        self.line.transform.position = position + Vector3.from_xyz(0, LINE_OFFSET, 0)
+
+        now = self.clock() if t is None else t
+        if self.text != self.shown and now - self.refreshed >= 1 / self.rate:
+            self.line.asset = text_asset(self.text)
+            self.shown = self.text
+            self.refreshed = now
+
+        self.xr.update(self.body)
+        self.xr.update(self.line)
+        self.body.asset = None
+        self.line.asset = None
+
+    def destroy(self):
+        self.xr.destroy_element(self.body)
+        self.xr.destroy_element(self.line)
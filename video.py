@@ -0,0 +1,280 @@
+import threading
+from collections import OrderedDict, deque
+from pathlib import Path
+
+from PIL import Image
+from xarp.entities import Element, ImageAsset
+from xarp.spatial import Transform, Vector3
+
+from anim import Scheduler
+from assets import display_size
+from telemetry import TELEMETRY
+from visibility import Visibility
+
+IMAGE_SUFFIXES = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.gif')
+
+
+# Frames of a clip: a list of image files, a directory of them (played in name
+# order) or a single multi-frame image such as an animated GIF, PNG or WebP.
+class FrameSource:
+    def __init__(self, source: str | Path | list):
+        self.file = None
+        if isinstance(source, (list, tuple)):
+            self.paths = [Path(p) for p in source]
+        elif Path(source).is_dir():
+            self.paths = sorted(p for p in Path(source).iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        else:
+            self.paths = []
+            self.file = Path(source)
+            with Image.open(self.file) as image:
+                self.frames = getattr(image, 'n_frames', 1)
+        if self.file is None:
+            self.frames = len(self.paths)
+        self._image = None
+
+    # Pixel size of the first frame, read from its header.
+    @property
+    def size(self) -> tuple[int, int]:
+        with Image.open(self.paths[0] if self.file is None else self.file) as image:
+            return image.size
+
+    # Decode frame i. Only called from the clip's decoder thread.
+    def read(self, i: int) -> Image.Image:
+        if self.file is None:
+            image = Image.open(self.paths[i])
+        else:
+            if self._image is None:
+                self._image = Image.open(self.file)
+            self._image.seek(i)
+            image = self._image
+        return image.convert('RGBA') if image.mode not in ('L', 'RGB', 'RGBA') else image.copy()
+
+    def close(self):
+        if self._image is not None:
+            self._image.close()
+
+
+# Encoded frames a shared clip keeps; the least recently used go first.
+CLIP_FRAMES = 32
+
+
+# Frames of a clip resampled for one display scale and encoded as image assets,
+# shared by every player of the clip in the process so concurrent sessions do
+# not decode and encode it again. A decoder thread decodes the frames players
+# ask for, in the order asked, and at most capacity encoded frames are kept.
+class Clip:
+    def __init__(self, source: str | Path | list, scale: float, capacity: int = CLIP_FRAMES):
+        self.source = FrameSource(source)
+        self.count = self.source.frames
+        size = self.source.size if self.count else (1, 1)
+        self.size = display_size(size, scale)
+        # Scale factor for elements showing the resampled frames.
+        self.scale = size[0] / self.size[0]
+        self.capacity = capacity
+        self.frames: OrderedDict[int, ImageAsset] = OrderedDict()
+        self.wanted: deque[int] = deque()
+        self.cond = threading.Condition()
+        self.stopped = False
+        # VideoPlayers holding the clip; see shared_clip and release_clip.
+        self.users = 0
+        self.decoder = threading.Thread(target = self._decode, name = "video-decoder", daemon = True)
+        self.decoder.start()
+
+    # Frame i if it is decoded. Otherwise None, and the decoder is asked for it.
+    def frame(self, i: int) -> ImageAsset | None:
+        with self.cond:
+            asset = self.frames.get(i)
+            if asset is not None:
+                self.frames.move_to_end(i)
+            elif i not in self.wanted:
+                self.wanted.append(i)
+                self.cond.notify_all()
+            return asset
+
+    # Block until every frame asked for so far is decoded.
+    def wait(self):
+        with self.cond:
+            while self.wanted and not self.stopped:
+                self.cond.wait()
+
+    def close(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify_all()
+
+    def _decode(self):
+        try:
+            while True:
+                with self.cond:
+                    while not self.wanted and not self.stopped:
+                        self.cond.wait()
+                    if self.stopped:
+                        return
+                    i = self.wanted[0]
+                image = self.source.read(i)
+                if image.size != self.size:
+                    image = image.resize(self.size, Image.Resampling.LANCZOS)
+                asset = ImageAsset.from_obj(obj = image)
+                with self.cond:
+                    self.wanted.popleft()
+                    self.frames[i] = asset
+                    while len(self.frames) > self.capacity:
+                        self.frames.popitem(last = False)
+                    self.cond.notify_all()
+        finally:
+            self.source.close()
+
+
+_clips: dict[tuple, Clip] = {}
+_clips_lock = threading.Lock()
+
+def _clip_key(source: str | Path | list, scale: float) -> tuple:
+    return (tuple(map(str, source)) if isinstance(source, (list, tuple)) else str(source), scale)
+
+# The Clip of source at scale shared by every session in this process. Each
+# call must be matched by a release_clip once the caller is done with it.
+# window is how many frames ahead of its playhead the caller asks for.
+def shared_clip(source: str | Path | list, scale: float, window: int = 0) -> Clip:
+    key = _clip_key(source, scale)
+    with _clips_lock:
+        clip = _clips.get(key)
+        if clip is None:
+            clip = _clips[key] = Clip(source, scale)
+        clip.users += 1
+        clip.capacity = max(clip.capacity, 2 * window)
+        return clip
+
+# Let go of a shared clip; the last user's release stops its decoder and frees
+# its frames.
+def release_clip(clip: Clip):
+    with _clips_lock:
+        clip.users -= 1
+        if clip.users > 0:
+            return
+        for key, shared in list(_clips.items()):
+            if shared is clip:
+                del _clips[key]
+    clip.close()
+
+# Block until every shared clip has decoded the frames asked for so far.
+def wait_decoded():
+    with _clips_lock:
+        clips = list(_clips.values())
+    for clip in clips:
+        clip.wait()
+
+
+# Plays a clip at fps frames per second of frame time. Each frame of the shared
+# Clip is uploaded once into one of a fixed pool of elements while it is still
+# hidden; playback only toggles which element is visible. Clips that fit in the
+# pool stay resident and loop without further uploads, longer ones recycle
+# elements behind the playhead. If decoding falls behind, the current frame is
+# held and playback carries on from the newest decoded frame, so a slow decoder
+# slows the clip down instead of stalling it for good.
+class VideoPlayer:
+    def __init__(self, visibility: Visibility, anim: Scheduler, key: str, source: str | Path | list,
+                 fps: float, transform: Transform, capacity: int = 16, loop: bool = True):
+        self.visibility = visibility
+        self.anim = anim
+        self.clip = shared_clip(source, transform.scale.x, capacity)
+        self.fps = fps
+        self.loop = loop
+
+        count = self.clip.count
+        self.resident = count <= capacity
+        scale = transform.scale * self.clip.scale
+
+        self.slots = [Element(
+            key = f"{key}_{i}",
+            transform = Transform(
+                position = transform.position + Vector3.zero(),
+                rotation = transform.rotation,
+                scale = scale,
+            ),
+        ) for i in range(min(capacity, count))]
+        # Sequence number (frames since playback began, across loops) held by each slot.
+        self.loaded = [-1] * len(self.slots)
+
+        self.seq = -1
+        self.index = -1
+        # Sequence number of the next frame to upload.
+        self.next = 0
+        self.shown: Element | None = None
+        self.flipbook = None
+
+    # Upload decoded frames into slots no longer needed by playback.
+    def _fill(self):
+        if self.clip is None:
+            return
+        count = self.clip.count
+        if not self.resident:
+            # Frames playback has passed are skipped; their slots hold newer ones.
+            self.next = max(self.next, self.seq)
+        end = max(self.seq, 0) + len(self.slots)
+        if self.resident or not self.loop:
+            end = min(end, count)
+        while self.next < end:
+            asset = self.clip.frame(self.next % count)
+            if asset is None:
+                break
+            slot = self.next % len(self.slots)
+            element = self.slots[slot]
+            self.visibility.hide(element)
+            element.asset = asset
+            self.visibility.xr.update(element)
+            element.asset = None
+            self.loaded[slot] = self.next
+            self.next += 1
+        # Ask for the rest of the window so it decodes ahead of playback.
+        for seq in range(self.next + 1, end):
+            self.clip.frame(seq % count)
+
+    def preload(self):
+        self._fill()
+
+    def play(self):
+        if self.flipbook is not None or not self.slots or self.clip is None:
+            return
+        self.flipbook = self.anim.flipbook(self._show, self.clip.count, 1 / self.fps)
+
+    def _show(self, index: int):
+        count = self.clip.count
+        step = 1 if self.index < 0 else (index - self.index) % count
+        self.index = index
+        if not self.loop and self.seq + step >= count:
+            self.stop()
+            return
+        self.seq += step
+
+        self._fill()
+        slot = self.seq % len(self.slots)
+        if self.loaded[slot] < 0 or (not self.resident and self.loaded[slot] != self.seq):
+            TELEMETRY.count("video_stalls")
+            behind = [seq for seq in self.loaded if 0 <= seq < self.seq]
+            if not behind:
+                return
+            self.seq = max(behind)
+            slot = self.seq % len(self.slots)
+            if not self.resident:
+                # Frames skipped on the way past are needed again.
+                self.next = min(self.next, self.seq + 1)
+        element = self.slots[slot]
+        if element is not self.shown:
+            self.visibility.show(element)
+            if self.shown is not None:
+                self.visibility.hide(self.shown)
+            self.shown = element
+
+    def stop(self):
+        if self.flipbook is not None:
+            self.anim.stop_flipbook(self.flipbook)
+            self.flipbook = None
+
+    def destroy(self):
+        self.stop()
+        for element in self.slots:
+            self.visibility.hide(element)
+        self.shown = None
+        if self.clip is not None:
+            release_clip(self.clip)
+            self.clip = None
@@ -0,0 +1,49 @@
+from xarp.entities import Element
+from xarp.spatial import Vector3
+
+GONE: Vector3 = Vector3.from_xyz(0, 9999, 0)
+
+
+def _gone() -> Vector3:
+    # A fresh copy, since callers move element positions in place.
+    return Vector3.from_xyz(GONE.x, GONE.y, GONE.z)
+
+
+# Shows and hides elements, sending an update only when an element actually
+# changes state. Elements with an active flag are toggled with it and keep their
+# transform on the client; others are teleported out of view and back, with
+# their last visible position remembered here.
+class Visibility:
+    def __init__(self, xr):
+        self.xr = xr
+        self.shown: dict[str, bool] = {}
+        self.positions: dict[str, Vector3] = {}
+
+    def visible(self, element: Element) -> bool:
+        return self.shown.get(element.key, True)
+
+    def hide(self, element: Element):
+        if not self.visible(element):
+            return
+        self.shown[element.key] = False
+        if hasattr(element, 'active'):
+            element.active = False
+        else:
+            self.positions[element.key] = element.transform.position
+            element.transform.position = _gone()
+        self.xr.update(element)
+
+    # Show an element where it was last visible, or at position if given. An
+    # element that is already shown is only moved.
+    def show(self, element: Element, position: Vector3 | None = None):
+        remembered = self.positions.pop(element.key, None)
+        if position is not None:
+            element.transform.position = position
+        elif self.visible(element):
+            return
+        elif remembered is not None:
+            element.transform.position = remembered
+        self.shown[element.key] = True
+        if hasattr(element, 'active'):
+            element.active = True
+        self.xr.update(element)